@@ -3,16 +3,23 @@ from checkdb import (
     save_review,
     create_user,
     verify_user,
-    insert_movie_if_not_exists,
+    upsert_movie_with_genres,
     recommend_movies_based_on_genre_and_overview,
+    recommend_movies_for_user,
     check_review_exists,
+    get_review_sentiment,
     get_db_connection,
-    insert_movie_genres
+    recommend_popular_movies,
+    get_todays_picks
 )
 import os
 import sys
 from dotenv import load_dotenv
-from lstm_model import predict_sentiment
+from lstm_model import predict_sentiment, start_warm_up
+from utils.db_pool import count_db_calls
+from utils import tracing
+import sentiment_worker
+import movie_stats
 
 # 환경 변수 로드
 ## 지현
@@ -20,6 +27,17 @@ from lstm_model import predict_sentiment
 ## 채린
 load_dotenv()
 
+# 이번 스크립트 실행 동안의 단계별 span을 모읍니다. (DB, TMDB, 감정 분석)
+tracing.begin_run()
+tracing.start_metrics_server()  # TRACING_METRICS_PORT가 설정된 경우에만 시작 (프로세스당 1회)
+TRACING_ADMIN_PANEL = os.getenv('TRACING_ADMIN_PANEL') == '1'
+REVIEW_LIST_LIMIT = 20  # 검색 화면에 표시하는 다른 사용자 리뷰 수
+
+# 배포 후 첫 사용자가 JVM 기동 지연을 겪지 않도록 백그라운드에서 미리 워밍업 (프로세스당 1회, 화면 렌더링은 기다리지 않음)
+start_warm_up(load_sentiment_model=os.getenv('WARM_UP_MODEL') == '1')
+if sentiment_worker.SENTIMENT_ASYNC:
+    sentiment_worker.start()  # 비동기 감정 분석 워커 (프로세스당 1회)
+
 st.set_page_config(
     page_title="무비뭐봐",
     page_icon="🎬",
@@ -34,9 +52,8 @@ sys.path.append(current_dir)
 
 from utils.api_fetch import (
     search_tmdb_movie,
-    get_tmdb_movie_details,
-    get_tmdb_movie_credits,
-    get_tmdb_movie_details_with_genres
+    get_tmdb_movie_details_many,
+    get_tmdb_movie_full
 )
 
 # CSS 스타일링
@@ -243,17 +260,22 @@ def display_user_reviews():
             """, (st.session_state.user_id,))
             reviews = cur.fetchall()
             if reviews:
+                # 포스터 정보를 한 번에 동시 요청
+                details_by_id = get_tmdb_movie_details_many([review['tmdb_id'] for review in reviews])
                 for review in reviews:
                     col1, col2 = st.columns([3, 1])
                     with col1:
-                        sentiment_kor = '좋아요' if review['sentiment'] == 'positive' else '싫어요'
                         st.markdown(f"**영화명:** {review['movie_name']}")
                         st.markdown(f"**리뷰:** {review['review_text']}")
-                        st.markdown(f"해당 영화가 {sentiment_kor}")
+                        if review['sentiment'] == sentiment_worker.PENDING:
+                            st.markdown("감정 분석 중")  # 비동기 워커가 아직 분석하지 않은 리뷰
+                        else:
+                            sentiment_kor = '좋아요' if review['sentiment'] == 'positive' else '싫어요'
+                            st.markdown(f"해당 영화가 {sentiment_kor}")
                         st.markdown("---")
                     with col2:
                         # 영화 포스터 가져오기
-                        movie_details = get_tmdb_movie_details(review['tmdb_id'])
+                        movie_details = details_by_id.get(review['tmdb_id'])
                         if movie_details and movie_details.get('poster_path'):
                             poster_url = f"https://image.tmdb.org/t/p/w500{movie_details['poster_path']}"
                             st.image(poster_url, width=100)  # 포스터 표시
@@ -270,6 +292,84 @@ def display_user_reviews():
         st.session_state.current_page = "search"  # 페이지 상태를 검색으로 변경
 
 
+# 추천 영화 목록을 포스터와 함께 5개씩 가로로 표시 (포스터는 한 번에 동시 요청)
+def display_movie_row(movies):
+    details_by_id = get_tmdb_movie_details_many([movie['tmdb_id'] for movie in movies])
+    cols = st.columns(5)  # 5개의 열 생성
+    for i, movie in enumerate(movies):
+        with cols[i % 5]:  # 5개씩 가로로 정렬
+            movie_details = details_by_id.get(movie['tmdb_id'])
+            if movie_details and movie_details.get('poster_path'):
+                poster_url = f"https://image.tmdb.org/t/p/w500{movie_details['poster_path']}"
+                st.image(poster_url, use_container_width=True)
+            else:
+                st.write("포스터 없음")
+            st.markdown(
+                f"[**{movie['movie_name']}**](https://www.themoviedb.org/movie/{movie['tmdb_id']})",
+                unsafe_allow_html=True,
+            )
+
+
+# 리뷰 감정에 따른 추천 영화 표시
+def display_recommendations(movie_id, sentiment):
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT movie_name FROM MOVIE WHERE movie_id = %s", (movie_id,))
+            selected_movie = cur.fetchone()
+            if selected_movie:
+                movie_name = selected_movie['movie_name']
+                if sentiment == "positive":
+                    st.subheader(f'"{movie_name}"와 비슷한 영화 추천')
+            
+                    # 유사한 영화 추천
+                    recommended_movies = recommend_movies_based_on_genre_and_overview(movie_id, limit=5)
+                    if recommended_movies:
+                        display_movie_row(recommended_movies)
+                    else:
+                        st.write("추천할 영화가 없습니다.")
+
+                    # 다른 사용자들의 리뷰 감정 기반 추천 (협업 필터링, 이웃 표가 있을 때만)
+                    personalized_movies = recommend_movies_for_user(st.session_state.user_id, limit=5)
+                    if personalized_movies:
+                        st.subheader("회원님과 취향이 비슷한 사용자들이 좋아한 영화")
+                        display_movie_row(personalized_movies)
+                else:
+                    # 부정 리뷰: 인기 영화 중에서 무작위 추천
+                    st.subheader("이런 영화는 어떠신가요?")
+                    popular_movies = recommend_popular_movies(limit=5, exclude_movie_id=movie_id)
+                    if popular_movies:
+                        display_movie_row(popular_movies)
+                    else:   
+                        st.write("추천할 영화가 없습니다.")
+            else:
+                st.error("선택된 영화의 이름을 가져오는 데 실패했습니다.")
+    finally:
+        conn.close()
+
+
+# 관리자용 단계별 지연 시간 패널 (TRACING_ADMIN_PANEL=1일 때 사이드바에 표시)
+def display_admin_panel():
+    with st.sidebar.expander("단계별 지연 시간"):
+        runs = tracing.get_recent_runs()
+        if runs:
+            last_run = runs[0]
+            st.write(f"**직전 실행:** {last_run.duration * 1000:.1f} ms, span {len(last_run.spans)}개")
+            totals = sorted(last_run.totals().items(), key=lambda item: item[1][1], reverse=True)
+            st.table([
+                {'단계': name, '호출': calls, '합계(ms)': round(total * 1000, 1)}
+                for name, (calls, total) in totals
+            ])
+            for name, value in last_run.values.items():
+                st.write(f"**{name}:** {value}")
+        st.write("**누적 (근사 분위수)**")
+        st.table([
+            {'단계': name, '호출': stats['count'], '평균(ms)': round(stats['mean_ms'], 1),
+             'p95(ms)': stats['p95_ms'], 'p99(ms)': stats['p99_ms']}
+            for name, stats in tracing.get_stage_stats().items()
+        ])
+
+
 # 로그인/회원가입 처리
 if not st.session_state.get('logged_in', False):
     if st.session_state.get('show_signup', False):
@@ -356,13 +456,14 @@ else:
                 if search_results and 'results' in search_results and len(search_results['results']) > 0:
                     movie_data = search_results['results'][0]
                     tmdb_id = movie_data['id']
-                    tmdb_movie_details, genres = get_tmdb_movie_details_with_genres(tmdb_id)
-                    tmdb_movie_credits = get_tmdb_movie_credits(tmdb_id)
+                    # 세부 정보, 장르, 출연진, 이미지를 한 번의 요청으로 가져오기
+                    tmdb_movie_details = get_tmdb_movie_full(tmdb_id)
                     if tmdb_movie_details:
                         st.session_state.show_recommendation = False  # 검색 결과를 표시할 경우 추천 영화 숨김
-                        st.session_state.selected_movie_id = insert_movie_if_not_exists(tmdb_movie_details, tmdb_movie_credits)
-                        if genres:
-                            insert_movie_genres(st.session_state.selected_movie_id, genres)
+                        # 영화와 장르를 한 트랜잭션으로 저장 (검색 1회의 DB 호출 수를 셈)
+                        with count_db_calls() as db_calls:
+                            movie_id = upsert_movie_with_genres(tmdb_movie_details)
+                        st.session_state.selected_movie_id = movie_id
                         col1, col2 = st.columns([2, 1])
                         with col1:
                             st.write(f"**영화명:** {tmdb_movie_details.get('title', 'N/A')}")
@@ -380,35 +481,38 @@ else:
                                                 <img src="{poster_url}" width="230">
                                             </div>
                                             """, unsafe_allow_html=True)
-                        # 영화 및 장르 저장
-                        movie_id = insert_movie_if_not_exists(tmdb_movie_details, tmdb_movie_credits)
-                        if genres:
-                            insert_movie_genres(movie_id, genres)
-                        st.session_state.selected_movie_id = movie_id
                         st.success("영화 정보가 저장되었습니다. 이제 리뷰를 작성해주세요.")
 
                         # **다른 사용자들의 리뷰를 표시하는 코드 추가**
                         st.subheader("다른 사용자들의 리뷰")
-                        conn = get_db_connection()
-                        try:
-                            with conn.cursor() as cur:
-                                # 리뷰와 사용자 이름을 가져오기 위해 USER 테이블과 JOIN
-                                cur.execute("""
-                                    SELECT r.review_text, r.sentiment, u.username
-                                    FROM REVIEW r
-                                    JOIN USER u ON r.user_id = u.user_id
-                                    WHERE r.movie_id = %s
-                                """, (movie_id,))
-                                reviews = cur.fetchall()
-                                if reviews:
-                                    for review in reviews:
-                                        st.markdown(f"**{review['username']}님의 리뷰:**")
-                                        st.write(review['review_text'])
-                                        st.markdown("---")
-                                else:
-                                    st.info("아직 이 영화에 대한 다른 사용자의 리뷰가 없습니다.")
-                        finally:
-                            conn.close()
+                        with count_db_calls(db_calls):
+                            conn = get_db_connection()
+                            try:
+                                with conn.cursor() as cur:
+                                    # 리뷰 수는 movie_stats 집계에서 읽고, 목록은 최신 리뷰 REVIEW_LIST_LIMIT개만 가져옴
+                                    stats = movie_stats.get_stats(cur, [movie_id]).get(movie_id)
+                                    if stats:
+                                        st.write(f"리뷰 {stats['review_count']}개 · 긍정 {stats['positive_count']}개")
+                                    # 리뷰와 사용자 이름을 가져오기 위해 USER 테이블과 JOIN
+                                    cur.execute("""
+                                        SELECT r.review_text, r.sentiment, u.username
+                                        FROM REVIEW r
+                                        JOIN USER u ON r.user_id = u.user_id
+                                        WHERE r.movie_id = %s
+                                        ORDER BY r.created_at DESC
+                                        LIMIT %s
+                                    """, (movie_id, REVIEW_LIST_LIMIT))
+                                    reviews = cur.fetchall()
+                                    if reviews:
+                                        for review in reviews:
+                                            st.markdown(f"**{review['username']}님의 리뷰:**")
+                                            st.write(review['review_text'])
+                                            st.markdown("---")
+                                    else:
+                                        st.info("아직 이 영화에 대한 다른 사용자의 리뷰가 없습니다.")
+                            finally:
+                                conn.close()
+                        tracing.record_value('search.db_calls', db_calls.calls)
 
                     else:
                         st.error("영화 상세 정보를 가져오는 데 실패했습니다.")
@@ -420,101 +524,54 @@ else:
         # 영화가 선택된 경우에만 리뷰 작성 섹션 표시
         if st.session_state.selected_movie_id:
             review_exists = check_review_exists(st.session_state.user_id, st.session_state.selected_movie_id)
-            if review_exists:
+            if review_exists and st.session_state.get('pending_review_movie_id') == st.session_state.selected_movie_id:
+                # 비동기 감정 분석 결과 확인
+                sentiment = get_review_sentiment(st.session_state.user_id, st.session_state.selected_movie_id)
+                if sentiment in ('positive', 'negative'):
+                    st.session_state.pending_review_movie_id = None
+                    st.success("리뷰가 저장되었습니다.")
+                    display_recommendations(st.session_state.selected_movie_id, sentiment)
+                else:
+                    st.info("리뷰 감정을 분석하고 있습니다. 잠시 후 다시 확인해주세요.")
+                    st.button("추천 결과 확인", key="check_pending_review")
+            elif review_exists:
                 st.warning("해당 영화에 대한 리뷰가 이미 존재합니다.")
             else:
                 st.subheader("리뷰 작성")
                 review_text = st.text_area("리뷰를 입력하세요", key="review_text")
                 if st.button("리뷰 제출"):
                     if review_text:
-                        sentiment = predict_sentiment(review_text)
-                        save_review(st.session_state.user_id, st.session_state.selected_movie_id, review_text, sentiment)
-                        st.success("리뷰가 저장되었습니다.")
-                        conn = get_db_connection()
-                        try:    
-                            with conn.cursor() as cur:
-                                cur.execute("SELECT movie_name FROM MOVIE WHERE movie_id = %s", (st.session_state.selected_movie_id,))
-                                selected_movie = cur.fetchone()
-                                if selected_movie:
-                                    movie_name = selected_movie['movie_name']
-                                    if sentiment == "positive":
-                                        st.subheader(f'"{movie_name}"와 비슷한 영화 추천')
-            
-                                        # 유사한 영화 추천
-                                        recommended_movies = recommend_movies_based_on_genre_and_overview(st.session_state.selected_movie_id, limit=5)
-                                        if recommended_movies:
-                                            cols = st.columns(5)  # 5개의 열 생성
-                                            for i, movie in enumerate(recommended_movies):
-                                                with cols[i % 5]:  # 5개씩 가로로 정렬
-                                                    movie_details = get_tmdb_movie_details(movie['tmdb_id'])
-                                                    if movie_details and movie_details.get('poster_path'):
-                                                        poster_url = f"https://image.tmdb.org/t/p/w500{movie_details['poster_path']}"
-                                                        st.image(poster_url, use_container_width=True)
-                                                    else:
-                                                        st.write("포스터 없음")
-                                                    st.markdown(
-                                                        f"[**{movie['movie_name']}**](https://www.themoviedb.org/movie/{movie['tmdb_id']})",
-                                                        unsafe_allow_html=True,
-                                                    )
-                                        else:
-                                            st.write("추천할 영화가 없습니다.")
-                                    else:
-                                        # 부정 리뷰: 랜덤 영화 추천
-                                        st.subheader("이런 영화는 어떠신가요?")
-                                        conn = get_db_connection()
-                                        with conn.cursor() as cur:
-                                            cur.execute("""
-                                                SELECT movie_name, tmdb_id
-                                                FROM movie_list
-                                                ORDER BY RAND()
-                                                LIMIT 5
-                                            """)
-                                            random_movies = cur.fetchall()  # 커서에서 fetchall() 호출
-                                            if random_movies:
-                                                cols = st.columns(5)
-                                                for i, movie in enumerate(random_movies):
-                                                    with cols[i % 5]:
-                                                        movie_details = get_tmdb_movie_details(movie['tmdb_id'])
-                                                        if movie_details and movie_details.get('poster_path'):
-                                                            poster_url = f"https://image.tmdb.org/t/p/w500{movie_details['poster_path']}"
-                                                            st.image(poster_url, use_container_width=True)
-                                                        else:
-                                                            st.write("포스터 없음")
-                                                        st.markdown(
-                                                            f"[**{movie['movie_name']}**](https://www.themoviedb.org/movie/{movie['tmdb_id']})",
-                                                            unsafe_allow_html=True,
-                                                        )
-                                            else:   
-                                                st.write("추천할 영화가 없습니다.")
-                                else:
-                                    st.error("선택된 영화의 이름을 가져오는 데 실패했습니다.")
-                        finally:
-                            conn.close()
+                        if sentiment_worker.SENTIMENT_ASYNC:
+                            # 리뷰를 먼저 저장하고 감정 분석은 백그라운드 워커에 맡김
+                            save_review(st.session_state.user_id, st.session_state.selected_movie_id, review_text, sentiment_worker.PENDING)
+                            sentiment_worker.submit(st.session_state.user_id, st.session_state.selected_movie_id, review_text)
+                            st.session_state.pending_review_movie_id = st.session_state.selected_movie_id
+                            st.success("리뷰가 저장되었습니다. 추천 결과를 준비하고 있습니다.")
+                            st.button("추천 결과 확인", key="check_pending_review")
+                        else:
+                            sentiment = predict_sentiment(review_text)
+                            save_review(st.session_state.user_id, st.session_state.selected_movie_id, review_text, sentiment)
+                            st.success("리뷰가 저장되었습니다.")
+                            display_recommendations(st.session_state.selected_movie_id, sentiment)
                     else:
                         st.error('리뷰를 작성해주세요.')
         else:
             # 로그인 후 첫 화면에서만 "오늘의 추천 영화" 표시
             st.subheader("오늘의 추천 영화")
-            conn = get_db_connection()
-            try:
-                with conn.cursor() as cur:
-                    cur.execute("""
-                        SELECT movie_name, tmdb_id
-                        FROM movie_list
-                        ORDER BY RAND()
-                        LIMIT 5
-                    """)
-                    movies = cur.fetchall()
-            finally:
-                conn.close()
+            movies = get_todays_picks(limit=5)
 
+            details_by_id = get_tmdb_movie_details_many([movie['tmdb_id'] for movie in movies])
             cols = st.columns(5)
             for i, movie in enumerate(movies):
                 with cols[i]:
-                    movie_details = get_tmdb_movie_details(movie['tmdb_id'])
+                    movie_details = details_by_id.get(movie['tmdb_id'])
                     if movie_details and movie_details.get('poster_path'):
                         st.image(f"https://image.tmdb.org/t/p/w500{movie_details['poster_path']}", width=150)
                     st.markdown(
                         f"[**{movie['movie_name']}**](https://www.themoviedb.org/movie/{movie['tmdb_id']})",
                         unsafe_allow_html=True,
-                    )
\ No newline at end of file
+                    )
+
+if TRACING_ADMIN_PANEL:
+    display_admin_panel()
+tracing.end_run()
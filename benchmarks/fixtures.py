@@ -0,0 +1,95 @@
+import random
+
+# 시드 고정 합성 데이터: 영화 카탈로그(TMDB 응답 모양), 사용자, 리뷰
+GENRE_IDS = [28, 12, 16, 35, 80, 99, 18, 10751, 14, 36, 27, 10402, 9648, 10749, 878, 53, 10752, 37]
+_WORDS = ('사랑 가족 전쟁 우주 비밀 복수 친구 여행 도시 시간 기억 음악 범죄 괴물 영웅 소년 소녀 '
+          '바다 마을 학교 경찰 탐정 꿈 운명 희망 배신 모험 왕국 미래 과거').split()
+_REVIEW_WORDS = {
+    'positive': '정말 재미있고 감동적인 최고의 영화 배우 연기 훌륭하다 추천'.split(),
+    'negative': '너무 지루하고 별로인 최악의 영화 시간 아깝다 실망 엉망'.split(),
+}
+
+
+def make_catalog(n_movies, seed=42):
+    """{tmdb_id: TMDB 세부 정보(+credits)} 형태의 합성 카탈로그를 만듭니다."""
+    rng = random.Random(seed)
+    catalog = {}
+    for i in range(n_movies):
+        tmdb_id = 100000 + i
+        title = f"{rng.choice(_WORDS)}의 {rng.choice(_WORDS)} {i}"
+        catalog[tmdb_id] = {
+            'id': tmdb_id,
+            'title': title,
+            'original_title': f"Movie {i}",
+            'release_date': f"{rng.randint(1980, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'runtime': rng.randint(80, 180),
+            'overview': ' '.join(rng.choice(_WORDS) for _ in range(rng.randint(15, 60))),
+            'poster_path': f"/poster_{tmdb_id}.jpg",
+            'genres': [{'id': g, 'name': str(g)} for g in rng.sample(GENRE_IDS, rng.randint(1, 3))],
+            'production_companies': [{'name': f"Studio {rng.randint(1, 50)}"}],
+            'credits': {
+                'cast': [{'name': f"배우 {rng.randint(1, 5000)}"} for _ in range(8)],
+                'crew': [{'name': f"감독 {rng.randint(1, 800)}", 'job': 'Director'}],
+            },
+        }
+    return catalog
+
+
+def make_review_text(rng, sentiment):
+    words = _REVIEW_WORDS[sentiment]
+    return ' '.join(rng.choice(words) for _ in range(rng.randint(5, 25)))
+
+
+def make_reviews(movie_ids, n_users, reviews_per_user, seed=42):
+    """(user_id, movie_id, review_text, sentiment) 목록을 만듭니다."""
+    rng = random.Random(seed)
+    reviews = []
+    for u in range(n_users):
+        for movie_id in rng.sample(movie_ids, min(reviews_per_user, len(movie_ids))):
+            sentiment = rng.choice(('positive', 'negative'))
+            reviews.append((f"user{u}", movie_id, make_review_text(rng, sentiment), sentiment))
+    return reviews
+
+
+def create_schema(conn, database):
+    """벤치마크 DB를 새로 만들고 migrate.py의 마이그레이션으로 앱과 같은 스키마를 적용합니다."""
+    from migrate import upgrade
+
+    with conn.cursor() as cur:
+        cur.execute(f"DROP DATABASE IF EXISTS `{database}`")
+        cur.execute(f"CREATE DATABASE `{database}` CHARACTER SET utf8mb4")
+    conn.select_db(database)
+    upgrade(conn)
+
+
+def seed_database(conn, catalog, n_users, reviews_per_user, seed=42):
+    """카탈로그를 movie_list, MOVIE, movie_genre에, 사용자와 리뷰를 USER, REVIEW에 넣고 movie_stats를 계산합니다."""
+    from checkdb import _movie_values
+    from movie_stats import rebuild
+
+    movies = list(catalog.values())
+    with conn.cursor() as cur:
+        values = [_movie_values(movie, movie['credits']) for movie in movies]
+        cur.executemany("""
+            INSERT INTO MOVIE (movie_name, tmdb_id, original_title, release_date, runtime, overview, director, cast, production_company, overview_tokens)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, [(*v, m['overview']) for m, v in zip(movies, values)])  # 합성 overview는 이미 명사 나열이므로 그대로 토큰으로 저장
+        cur.executemany("""
+            INSERT INTO movie_list (movie_name, genre_id, tmdb_id, original_title, release_date, runtime, overview, director, cast, production_company)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, [(v[0], m['genres'][0]['id'], *v[1:]) for m, v in zip(movies, values)])
+        cur.execute("SELECT movie_id, tmdb_id FROM MOVIE")
+        movie_id_of = {row['tmdb_id']: row['movie_id'] for row in cur.fetchall()}
+        cur.executemany("INSERT INTO movie_genre (movie_id, genre_id) VALUES (%s, %s)", [
+            (movie_id_of[m['id']], g['id']) for m in movies for g in m['genres']
+        ])
+        cur.executemany("INSERT INTO USER (user_id, password, username) VALUES (%s, %s, %s)", [
+            (f"user{u}", 'x', f"사용자{u}") for u in range(n_users)
+        ])
+        reviews = make_reviews(sorted(movie_id_of.values()), n_users, reviews_per_user, seed)
+        cur.executemany("""
+            INSERT INTO REVIEW (user_id, movie_id, review_text, sentiment) VALUES (%s, %s, %s, %s)
+        """, reviews)
+        rebuild(cur)
+    conn.commit()
+    return movie_id_of
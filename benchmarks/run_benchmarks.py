@@ -0,0 +1,261 @@
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# 오프라인 종단 간 벤치마크
+# - 시드 고정 합성 카탈로그/리뷰를 로컬 MySQL(또는 MariaDB) 벤치마크 전용 DB에 넣고,
+#   TMDB는 로컬 스텁 서버(stub_tmdb.py)로 대신합니다. 외부 네트워크는 사용하지 않습니다.
+# - 작업마다 p50/p95/p99 지연 시간과 처리량을 출력하고, 커밋별로 비교할 수 있게 JSON으로 저장합니다.
+#
+# 사용 예:
+#   BENCH_DB_HOST=127.0.0.1 BENCH_DB_USER=root BENCH_DB_PASSWORD=... python benchmarks/run_benchmarks.py
+#   python benchmarks/run_benchmarks.py --compare benchmarks/results/<이전 커밋>.json
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+BENCH_DB_HOST = os.getenv('BENCH_DB_HOST', '127.0.0.1')
+BENCH_DB_PORT = int(os.getenv('BENCH_DB_PORT', 3306))
+BENCH_DB_USER = os.getenv('BENCH_DB_USER', 'root')
+BENCH_DB_PASSWORD = os.getenv('BENCH_DB_PASSWORD', '')
+BENCH_DB_NAME = os.getenv('BENCH_DB_NAME', 'movie_bench')  # 매 실행마다 지우고 다시 만듭니다.
+
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
+
+def measure(name, fn, inputs, warmup=3):
+    """inputs의 각 값으로 fn을 호출하며 지연 시간을 잽니다. (처음 warmup회는 제외)"""
+    for value in inputs[:warmup]:
+        fn(value)
+    latencies = []
+    started = time.perf_counter()
+    for value in inputs:
+        t0 = time.perf_counter()
+        fn(value)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    result = {
+        'n': len(latencies),
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'mean_ms': statistics.fmean(latencies) if latencies else 0.0,
+        'ops_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+    }
+    print(f"{name:<32} n={result['n']:<5} p50={result['p50_ms']:8.2f}ms p95={result['p95_ms']:8.2f}ms "
+          f"p99={result['p99_ms']:8.2f}ms {result['ops_per_sec']:8.1f} ops/s")
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def setup_environment(stub_url, work_dir):
+    # 앱 모듈이 import 시점에 환경 변수를 읽으므로 import 전에 벤치마크용 값으로 바꿔 둡니다.
+    # 실행 중에 생기는 파일(지표, TF-IDF 인덱스, 이웃 표)은 models/, data/ 대신 work_dir에 씁니다.
+    os.environ.update({
+        'DB_HOST': BENCH_DB_HOST,
+        'DB_PORT': str(BENCH_DB_PORT),
+        'DB_USER': BENCH_DB_USER,
+        'DB_PASSWORD': BENCH_DB_PASSWORD,
+        'DB_NAME': BENCH_DB_NAME,
+        'TMDB_API_KEY': 'bench',
+        'TMDB_BASE_URL': stub_url,
+        'TMDB_DISK_CACHE_PATH': '',  # 실행 간 캐시가 남지 않도록 디스크 캐시는 끕니다.
+        'TMDB_RATE_LIMIT': '100000',
+        'TMDB_RATE_BURST': '100000',
+        'TRACING_EXPORT_PATH': os.path.join(work_dir, 'metrics.prom'),
+    })
+
+
+def create_database(catalog, args):
+    import pymysql
+    from fixtures import create_schema, seed_database
+
+    conn = pymysql.connect(host=BENCH_DB_HOST, port=BENCH_DB_PORT, user=BENCH_DB_USER, password=BENCH_DB_PASSWORD,
+                           charset='utf8mb4', cursorclass=pymysql.cursors.DictCursor)
+    try:
+        create_schema(conn, BENCH_DB_NAME)
+        return seed_database(conn, catalog, args.users, args.reviews_per_user, args.seed)
+    finally:
+        conn.close()
+
+
+def bench_sentiment(results, rng, n):
+    from fixtures import make_review_text
+    try:
+        from lstm_model import preprocess_text, predict_sentiment, get_model_and_tokenizer, warm_up
+        warm_up()
+    except Exception as e:
+        print(f"감정 분석 벤치마크를 건너뜁니다: {e}")
+        return
+    texts = [make_review_text(rng, rng.choice(('positive', 'negative'))) for _ in range(n)]
+    results['preprocess_text'] = measure('preprocess_text', preprocess_text, texts)
+    try:
+        get_model_and_tokenizer()
+    except Exception as e:
+        print(f"predict_sentiment 벤치마크를 건너뜁니다 (모델 없음): {e}")
+        return
+    results['predict_sentiment'] = measure('predict_sentiment', predict_sentiment, texts)
+
+
+def bench_recommend(results, movie_ids, n_users, rng, n, work_dir):
+    import cf_recommender
+    from checkdb import recommend_movies_based_on_genre_and_overview, recommend_movies_for_user
+
+    inputs = [rng.choice(movie_ids) for _ in range(n)]
+    results['recommend_genre_overview'] = measure(
+        'recommend_genre_overview', recommend_movies_based_on_genre_and_overview, inputs)
+
+    cf_recommender.NEIGHBORS_PATH = os.path.join(work_dir, 'cf_neighbors.npz')
+    cf_recommender.build(cf_recommender.NEIGHBORS_PATH)
+    users = [f"user{rng.randrange(n_users)}" for _ in range(n)]
+    results['recommend_for_user'] = measure('recommend_for_user', recommend_movies_for_user, users)
+
+
+def search_flow(title):
+    """app.py 검색 흐름: 검색 → 세부 정보 → 저장 → 다른 사용자 리뷰 조회. 저장과 리뷰 조회의 DB 호출 수를 반환합니다."""
+    from checkdb import upsert_movie_with_genres, get_db_connection
+    from utils.api_fetch import search_tmdb_movie, get_tmdb_movie_full
+    from utils.db_pool import count_db_calls
+
+    search_results = search_tmdb_movie(title)
+    if not search_results or not search_results.get('results'):
+        return None
+    details = get_tmdb_movie_full(search_results['results'][0]['id'])
+    if not details:
+        return None
+    with count_db_calls() as db_calls:
+        movie_id = upsert_movie_with_genres(details)
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT r.review_text, r.sentiment, u.username
+                    FROM REVIEW r
+                    JOIN USER u ON r.user_id = u.user_id
+                    WHERE r.movie_id = %s
+                    ORDER BY r.created_at DESC
+                    LIMIT %s
+                """, (movie_id, 20))
+                cur.fetchall()
+        finally:
+            conn.close()
+    return db_calls.calls
+
+
+def bench_search(results, catalog, rng, n):
+    from utils.tmdb_cache import clear_tmdb_cache
+
+    titles = [movie['title'] for movie in rng.sample(list(catalog.values()), min(n, len(catalog)))]
+
+    db_calls = []
+
+    def cold(title):
+        clear_tmdb_cache()
+        db_calls.append(search_flow(title))
+
+    def warm(title):
+        db_calls.append(search_flow(title))
+
+    # 검색 1회의 DB 호출 수도 결과에 남겨 커밋 간 왕복 횟수 회귀를 확인합니다. (워밍업 호출 제외)
+    for name, fn in (('search_flow_cold', cold), ('search_flow_warm', warm)):
+        db_calls.clear()
+        results[name] = measure(name, fn, titles)
+        measured = [calls for calls in db_calls[-results[name]['n']:] if calls is not None]
+        results[name]['db_calls_mean'] = statistics.fmean(measured) if measured else 0.0
+        print(f"{'':<32} DB 호출 평균 {results[name]['db_calls_mean']:.1f}회")
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\n{baseline.get('revision')} → {current['revision']} 비교 (p50 / p95 변화율)")
+    for name, result in current['operations'].items():
+        before = baseline.get('operations', {}).get(name)
+        if not before:
+            print(f"{name:<32} (기준 결과 없음)")
+            continue
+        changes = []
+        for key in ('p50_ms', 'p95_ms'):
+            changes.append((result[key] - before[key]) / before[key] * 100.0 if before[key] else 0.0)
+        print(f"{name:<32} p50 {changes[0]:+7.1f}%  p95 {changes[1]:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 종단 간 벤치마크")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--movies', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--reviews-per-user', type=int, default=20)
+    parser.add_argument('--iterations', type=int, default=200, help="작업별 측정 횟수")
+    parser.add_argument('--tmdb-latency-ms', type=float, default=30, help="스텁 TMDB 응답 지연")
+    parser.add_argument('--skip-sentiment', action='store_true')
+    parser.add_argument('--output', help="결과 JSON 경로 (기본: benchmarks/results/<git 리비전>.json)")
+    parser.add_argument('--compare', help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    from fixtures import make_catalog
+    from stub_tmdb import StubTMDB
+
+    rng = random.Random(args.seed)
+    catalog = make_catalog(args.movies, args.seed)
+    stub = StubTMDB(catalog, latency_ms=args.tmdb_latency_ms).start()
+    work_dir = tempfile.mkdtemp(prefix='movie_bench_')
+    setup_environment(stub.base_url, work_dir)
+    try:
+        import content_index
+        content_index.INDEX_PATH = os.path.join(work_dir, 'tfidf_index.pkl')
+
+        print(f"합성 데이터 생성: 영화 {args.movies}편, 사용자 {args.users}명 → {BENCH_DB_NAME}")
+        movie_id_of = create_database(catalog, args)
+
+        operations = {}
+        if not args.skip_sentiment:
+            bench_sentiment(operations, rng, args.iterations)
+        bench_recommend(operations, sorted(movie_id_of.values()), args.users, rng, args.iterations, work_dir)
+        bench_search(operations, catalog, rng, args.iterations)
+    finally:
+        stub.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    current = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'params': vars(args),
+        'tmdb_requests': stub.requests,
+        'operations': operations,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{current['revision']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(current, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {output}")
+
+    if args.compare:
+        compare(current, args.compare)
+
+
+if __name__ == "__main__":
+    main()
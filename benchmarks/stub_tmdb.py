@@ -0,0 +1,83 @@
+import json
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# 벤치마크용 로컬 TMDB 스텁 서버. 합성 카탈로그로 TMDB와 같은 모양의 JSON을 돌려줍니다.
+
+
+class StubTMDB:
+    """
+    catalog: {tmdb_id: 세부 정보 딕셔너리}. latency_ms만큼 응답을 지연시켜 실제 네트워크 왕복을 흉내 냅니다.
+    """
+
+    def __init__(self, catalog, latency_ms=30, host='127.0.0.1', port=0):
+        self.catalog = catalog
+        self.latency = latency_ms / 1000.0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/3"
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                time.sleep(stub.latency)
+                url = urlparse(self.path)
+                status, body = stub.route(url.path, {k: v[0] for k, v in parse_qs(url.query).items()})
+                payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def route(self, path, params):
+        match = re.fullmatch(r'/3/movie/(\d+)(/credits)?', path)
+        if match:
+            movie = self.catalog.get(int(match.group(1)))
+            if movie is None:
+                return 404, {'status_code': 34, 'status_message': 'The resource you requested could not be found.'}
+            if match.group(2):
+                return 200, movie['credits']
+            body = {k: v for k, v in movie.items() if k != 'credits'}
+            appended = params.get('append_to_response', '').split(',')
+            if 'credits' in appended:
+                body['credits'] = movie['credits']
+            if 'images' in appended:
+                body['images'] = {'backdrops': [], 'posters': [{'file_path': movie['poster_path']}]}
+            return 200, body
+        if path == '/3/search/movie':
+            query = params.get('query', '')
+            results = [
+                {k: v for k, v in m.items() if k != 'credits'}
+                for m in self.catalog.values() if query and query in m['title']
+            ][:20]
+            return 200, {'page': 1, 'results': results, 'total_pages': 1, 'total_results': len(results)}
+        return 404, {'status_code': 34}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='stub-tmdb', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,222 @@
+import argparse
+import os
+import threading
+import time
+import numpy as np
+from scipy import sparse
+
+# REVIEW 감정(positive=+1, negative=-1)으로 만든 사용자×영화 희소 행렬에서 아이템-아이템 협업 필터링 이웃을 계산합니다.
+# - 오프라인 배치(build)로 영화마다 상위 TOP_N 이웃과 유사도를 미리 계산해 npz 한 개로 저장합니다.
+# - 서비스에서는 CSR 형태의 배열(영화 ID, 이웃 시작 위치, 이웃 열 번호, 유사도)만 메모리에 올려 조회합니다.
+NEIGHBORS_PATH = 'models/cf_neighbors.npz'
+TOP_N = int(os.getenv('CF_TOP_N', 50))  # 영화마다 저장하는 이웃 수
+SHRINKAGE = float(os.getenv('CF_SHRINKAGE', 10))  # 함께 평가한 사용자가 적은 쌍의 유사도를 줄이는 정도
+BLOCK_SIZE = int(os.getenv('CF_BLOCK_SIZE', 256))  # 한 번에 유사도를 계산하는 영화 수
+RELOAD_CHECK_INTERVAL = 60.0  # 이웃 파일이 바뀌었는지 확인하는 주기(초)
+
+SENTIMENT_VALUES = {'positive': 1.0, 'negative': -1.0}
+
+
+def build_rating_matrix(reviews):
+    """
+    (user_id, movie_id, sentiment) 목록으로 사용자×영화 희소 행렬을 만듭니다.
+    반환값은 (행렬, 열 번호 순서의 movie_id 배열)이며, 'pending' 등 다른 값은 건너뜁니다.
+    """
+    user_of = {}
+    users, movies, values = [], [], []
+    for user_id, movie_id, sentiment in reviews:
+        value = SENTIMENT_VALUES.get(sentiment)
+        if value is None:
+            continue
+        users.append(user_of.setdefault(user_id, len(user_of)))
+        movies.append(movie_id)
+        values.append(value)
+    movie_ids, columns = np.unique(np.asarray(movies, dtype=np.int64), return_inverse=True)
+    matrix = sparse.csc_matrix(
+        (np.asarray(values, dtype=np.float32), (np.asarray(users, dtype=np.int64), columns)),
+        shape=(len(user_of), len(movie_ids)),
+    )
+    matrix.sum_duplicates()
+    return matrix, movie_ids
+
+
+def compute_neighbors(matrix, top_n=TOP_N, shrinkage=SHRINKAGE, block_size=BLOCK_SIZE):
+    """
+    영화(열)마다 코사인 유사도 상위 top_n개의 이웃을 CSR 배열 (indptr, 이웃 열 번호, 유사도)로 반환합니다.
+    유사도는 함께 평가한 사용자 수 c에 대해 c / (c + shrinkage)를 곱해 줄이고, 0 이하인 이웃은 저장하지 않습니다.
+    전체 영화×영화 행렬을 만들지 않도록 block_size개 열씩 나눠 계산합니다.
+    """
+    matrix = sparse.csc_matrix(matrix, dtype=np.float32)
+    n_movies = matrix.shape[1]
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    norms[norms == 0] = 1.0
+    normalized = sparse.csc_matrix(matrix @ sparse.diags(1.0 / norms))
+    rated = sparse.csc_matrix((matrix != 0).astype(np.float32))
+    normalized_t = normalized.T.tocsr()
+    rated_t = rated.T.tocsr()
+
+    indptr = np.zeros(n_movies + 1, dtype=np.int64)
+    neighbor_blocks, score_blocks = [], []
+    for start in range(0, n_movies, block_size):
+        stop = min(start + block_size, n_movies)
+        similarity = (normalized_t @ normalized[:, start:stop]).toarray()
+        if shrinkage > 0:
+            co_counts = (rated_t @ rated[:, start:stop]).toarray()
+            similarity *= co_counts / (co_counts + shrinkage)
+        similarity[np.arange(start, stop), np.arange(stop - start)] = 0.0  # 자기 자신 제외
+
+        for offset in range(stop - start):
+            column = similarity[:, offset]
+            k = min(top_n, n_movies)
+            top = np.argpartition(-column, k - 1)[:k] if k < n_movies else np.arange(n_movies)
+            top = top[column[top] > 0]
+            top = top[np.argsort(-column[top], kind='stable')]
+            neighbor_blocks.append(top.astype(np.int32))
+            score_blocks.append(column[top].astype(np.float32))
+            indptr[start + offset + 1] = indptr[start + offset] + len(top)
+
+    neighbors = np.concatenate(neighbor_blocks) if neighbor_blocks else np.zeros(0, dtype=np.int32)
+    scores = np.concatenate(score_blocks) if score_blocks else np.zeros(0, dtype=np.float32)
+    return indptr, neighbors, scores
+
+
+class NeighborTable:
+    """
+    미리 계산한 아이템-아이템 이웃 표입니다. movie_ids는 정렬되어 있어 searchsorted로 행을 찾습니다.
+    """
+
+    def __init__(self, movie_ids, indptr, neighbors, scores):
+        self.movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.neighbors = np.asarray(neighbors, dtype=np.int32)
+        self.scores = np.asarray(scores, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.movie_ids)
+
+    def _row(self, movie_id):
+        row = int(np.searchsorted(self.movie_ids, movie_id))
+        if row < len(self.movie_ids) and self.movie_ids[row] == movie_id:
+            return row
+        return None
+
+    def similar(self, movie_id, limit=5):
+        """movie_id와 함께 좋아하거나 싫어한 사용자가 많은 영화를 (movie_id, 유사도) 목록으로 반환합니다."""
+        row = self._row(movie_id)
+        if row is None:
+            return []
+        start, stop = self.indptr[row], min(self.indptr[row + 1], self.indptr[row] + limit)
+        return [(int(self.movie_ids[column]), float(score))
+                for column, score in zip(self.neighbors[start:stop], self.scores[start:stop])]
+
+    def recommend(self, ratings, limit=5):
+        """
+        사용자의 평가 {movie_id: +1/-1}로 이웃 점수를 합산해 아직 평가하지 않은 영화 상위 limit개를
+        (movie_id, 점수) 목록으로 반환합니다. 좋아한 영화의 이웃은 점수가 오르고 싫어한 영화의 이웃은 내려갑니다.
+        """
+        columns, weights = [], []
+        rated_rows = []
+        for movie_id, value in ratings.items():
+            row = self._row(movie_id)
+            if row is None:
+                continue
+            rated_rows.append(row)
+            start, stop = self.indptr[row], self.indptr[row + 1]
+            columns.append(self.neighbors[start:stop])
+            weights.append(self.scores[start:stop] * value)
+        if not columns or limit <= 0:
+            return []
+
+        candidates, inverse = np.unique(np.concatenate(columns), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(weights))
+        keep = (totals > 0) & ~np.isin(candidates, rated_rows)
+        candidates, totals = candidates[keep], totals[keep]
+        if len(candidates) == 0:
+            return []
+        k = min(limit, len(candidates))
+        top = np.argpartition(-totals, k - 1)[:k]
+        top = top[np.argsort(-totals[top], kind='stable')]
+        return [(int(self.movie_ids[candidates[i]]), float(totals[i])) for i in top]
+
+    def save(self, path=NEIGHBORS_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, movie_ids=self.movie_ids, indptr=self.indptr, neighbors=self.neighbors, scores=self.scores)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=NEIGHBORS_PATH):
+        with np.load(path) as data:
+            return cls(data['movie_ids'], data['indptr'], data['neighbors'], data['scores'])
+
+
+_table = None
+_table_mtime = None
+_table_checked_at = None
+_table_lock = threading.Lock()
+
+
+def get_neighbor_table():
+    """
+    공유 이웃 표를 반환합니다. 파일이 없으면 None입니다.
+    build로 파일이 바뀌면 RELOAD_CHECK_INTERVAL 안에 다시 로드합니다.
+    """
+    global _table, _table_mtime, _table_checked_at
+    if _table_checked_at is not None and time.monotonic() - _table_checked_at < RELOAD_CHECK_INTERVAL:
+        return _table
+    with _table_lock:
+        if _table_checked_at is None or time.monotonic() - _table_checked_at >= RELOAD_CHECK_INTERVAL:
+            try:
+                mtime = os.path.getmtime(NEIGHBORS_PATH)
+            except OSError:
+                mtime = None
+            if mtime is None:
+                _table = None
+            elif mtime != _table_mtime:
+                _table = NeighborTable.load(NEIGHBORS_PATH)
+            _table_mtime = mtime
+            _table_checked_at = time.monotonic()
+    return _table
+
+
+def _stream_reviews(conn):
+    import pymysql
+    with conn.cursor(pymysql.cursors.SSCursor) as cur:
+        cur.execute("SELECT user_id, movie_id, sentiment FROM REVIEW WHERE sentiment IN ('positive', 'negative')")
+        while True:
+            rows = cur.fetchmany(10000)
+            if not rows:
+                break
+            yield from rows
+
+
+def build(path=NEIGHBORS_PATH, top_n=TOP_N, shrinkage=SHRINKAGE):
+    """REVIEW 전체로 이웃 표를 새로 계산해 저장합니다. (오프라인 배치)"""
+    from checkdb import get_db_connection
+
+    started = time.perf_counter()
+    conn = get_db_connection()
+    try:
+        matrix, movie_ids = build_rating_matrix(_stream_reviews(conn))
+    finally:
+        conn.close()
+    indptr, neighbors, scores = compute_neighbors(matrix, top_n, shrinkage)
+    table = NeighborTable(movie_ids, indptr, neighbors, scores)
+    table.save(path)
+    elapsed = time.perf_counter() - started
+    print(f"협업 필터링 이웃 계산 완료: 사용자 {matrix.shape[0]}명, 영화 {len(movie_ids)}편, "
+          f"리뷰 {matrix.nnz}건, 이웃 {len(neighbors)}개, {elapsed:.1f}s -> {path} ({os.path.getsize(path) / 1024:.0f} KiB)")
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="REVIEW 감정 기반 아이템-아이템 협업 필터링 이웃 계산")
+    parser.add_argument('command', choices=['build'])
+    parser.add_argument('--top-n', type=int, default=TOP_N)
+    parser.add_argument('--shrinkage', type=float, default=SHRINKAGE)
+    parser.add_argument('--output', default=NEIGHBORS_PATH)
+    args = parser.parse_args()
+
+    build(args.output, args.top_n, args.shrinkage)
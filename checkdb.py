@@ -1,10 +1,16 @@
 import pymysql
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import os
+import sys
 from dotenv import load_dotenv
 import bcrypt
 import random
+import numpy as np
+from utils.db_pool import get_pool, PoolTimeoutError, DB_CONNECT_TIMEOUT, DB_READ_TIMEOUT, DB_WRITE_TIMEOUT
+from utils.tracing import instrument_module
+import content_index
+import cf_recommender
+import movie_sampler
+import movie_stats
 
 # 환경 변수 로드
 ## 지현
@@ -13,26 +19,41 @@ load_dotenv(dotenv_path="C:\\Users\\you0m\\Desktop\\movie\\env_example.env")
 # load_dotenv()
 
 DB_HOST = os.getenv('DB_HOST')
+DB_PORT = int(os.getenv('DB_PORT', 3306))
 DB_USER = os.getenv('DB_USER')
 DB_PASSWORD = os.getenv('DB_PASSWORD')
 DB_NAME = os.getenv('DB_NAME')
 
+POPULAR_POOL_SIZE = 50  # 인기 영화 추천 시 후보로 삼는 상위 영화 수
+
+
+def _connect():
+    return pymysql.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        db=DB_NAME,
+        charset='utf8mb4',
+        cursorclass=pymysql.cursors.DictCursor,
+        connect_timeout=DB_CONNECT_TIMEOUT,
+        read_timeout=DB_READ_TIMEOUT,
+        write_timeout=DB_WRITE_TIMEOUT
+    )
+
+
+def get_db_pool():
+    """같은 접속 정보를 쓰는 모든 호출이 공유하는 커넥션 풀을 반환합니다."""
+    return get_pool(f"{DB_USER}@{DB_HOST}:{DB_PORT}/{DB_NAME}", _connect)
+
 
 def get_db_connection():
     """
-    MySQL 데이터베이스에 연결합니다.
+    커넥션 풀에서 MySQL 연결을 빌려옵니다. close()를 호출하면 풀에 반납됩니다.
     """
     try:
-        connection = pymysql.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            db=DB_NAME,
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
-        )
-        return connection
-    except pymysql.MySQLError as e:
+        return get_db_pool().get()
+    except (pymysql.MySQLError, PoolTimeoutError) as e:
         print(f"Error connecting to the database: {e}")
         return None
 
@@ -80,71 +101,270 @@ def insert_movie_list(movie_data):
         conn.close()
 
 
-def insert_movie_if_not_exists(tmdb_data=None, tmdb_credits=None):
+def _movie_values(tmdb_data, tmdb_credits):
+    """TMDB 세부 정보와 credits로 MOVIE 테이블 컬럼 값을 만듭니다."""
+    return (
+        tmdb_data.get('title', 'N/A'),
+        tmdb_data.get('id'),
+        tmdb_data.get('original_title', 'N/A'),
+        tmdb_data.get('release_date') or None,
+        tmdb_data.get('runtime') or 0,
+        tmdb_data.get('overview', 'N/A'),
+        ', '.join([crew['name'] for crew in tmdb_credits.get('crew', []) if crew['job'] == 'Director']),
+        ', '.join([cast['name'] for cast in tmdb_credits.get('cast', [])[:5]]),
+        ', '.join([company['name'] for company in tmdb_data.get('production_companies', [])])
+    )
+
+
+def _overview_tokens(tmdb_data):
+    """overview의 추천용 Okt 토큰 문자열 (수집 시 한 번만 계산해 MOVIE.overview_tokens에 저장)"""
+    from lstm_model import tokenize_overview
+    return tokenize_overview(tmdb_data.get('overview'))
+
+
+def bulk_upsert_movies(movies):
     """
-    영화와 장르 데이터를 MOVIE 및 movie_genre 테이블에 저장
+    get_tmdb_movie_full 결과 목록을 movie_list, MOVIE, movie_genre에 일괄 upsert합니다.
+    executemany로 테이블마다 한 번씩 보내고 한 번만 커밋합니다. 저장한 영화 수를 반환합니다.
     """
+    movies = [movie for movie in movies if movie and movie.get('id')]
+    if not movies:
+        return 0
     conn = get_db_connection()
     if not conn:
         print("Database connection failed.")
-        return
+        return 0
+    movie_values = [_movie_values(movie, movie.get('credits') or {}) for movie in movies]
+    overview_tokens = [_overview_tokens(movie) for movie in movies]  # 커넥션을 빌리기 전에 형태소 분석
     try:
         with conn.cursor() as cur:
-            # 영화가 이미 존재하는지 확인
-            tmdb_id = tmdb_data.get('id')
-            if not tmdb_id:
-                print("TMDB ID가 없습니다.")
-                return None
-
-            sql_check = "SELECT movie_id FROM MOVIE WHERE tmdb_id = %s"
-            cur.execute(sql_check, (tmdb_id,))
-            result = cur.fetchone()
-            if result:
-                movie_id = result['movie_id']
-                genres = tmdb_data.get('genres', [])
-                insert_movie_genres(movie_id, genres)  # 장르 업데이트
-                return movie_id
-
-            # 영화 데이터 삽입
-            sql_insert = """
-            INSERT INTO MOVIE (movie_name, tmdb_id, original_title, release_date, runtime, overview, director, cast, production_company)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """
-            cur.execute(sql_insert, (
-                tmdb_data.get('title', 'N/A'),
-                tmdb_id,
-                tmdb_data.get('original_title', 'N/A'),
-                tmdb_data.get('release_date', '0000-00-00'),
-                tmdb_data.get('runtime', 0),
-                tmdb_data.get('overview', 'N/A'),
-                ', '.join([crew['name'] for crew in tmdb_credits.get('crew', []) if crew['job'] == 'Director']),
-                ', '.join([cast['name'] for cast in tmdb_credits.get('cast', [])[:5]]),
-                ', '.join([company['name'] for company in tmdb_data.get('production_companies', [])])
-            ))
+            cur.executemany("""
+                INSERT INTO movie_list (movie_name, genre_id, tmdb_id, original_title, release_date, runtime, overview, director, cast, production_company)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    movie_name = VALUES(movie_name),
+                    genre_id = VALUES(genre_id),
+                    original_title = VALUES(original_title),
+                    release_date = VALUES(release_date),
+                    runtime = VALUES(runtime),
+                    overview = VALUES(overview),
+                    director = VALUES(director),
+                    cast = VALUES(cast),
+                    production_company = VALUES(production_company)
+            """, [
+                (values[0], (movie.get('genres') or [{'id': None}])[0]['id'], *values[1:])
+                for movie, values in zip(movies, movie_values)
+            ])
+            cur.executemany("""
+                INSERT INTO MOVIE (movie_name, tmdb_id, original_title, release_date, runtime, overview, director, cast, production_company, overview_tokens)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    movie_name = VALUES(movie_name),
+                    original_title = VALUES(original_title),
+                    release_date = VALUES(release_date),
+                    runtime = VALUES(runtime),
+                    overview = VALUES(overview),
+                    director = VALUES(director),
+                    cast = VALUES(cast),
+                    production_company = VALUES(production_company),
+                    overview_tokens = VALUES(overview_tokens)
+            """, [(*values, tokens) for values, tokens in zip(movie_values, overview_tokens)])
+
+            # 장르 연결에 필요한 movie_id를 한 번에 조회
+            tmdb_ids = [movie['id'] for movie in movies]
+            placeholders = ', '.join(['%s'] * len(tmdb_ids))
+            cur.execute(f"SELECT movie_id, tmdb_id FROM MOVIE WHERE tmdb_id IN ({placeholders})", tuple(tmdb_ids))
+            movie_id_of = {row['tmdb_id']: row['movie_id'] for row in cur.fetchall()}
+            genre_values = [
+                (movie_id_of[movie['id']], genre['id'])
+                for movie in movies if movie['id'] in movie_id_of
+                for genre in movie.get('genres') or []
+            ]
+            if genre_values:
+                cur.executemany("""
+                    INSERT INTO movie_genre (movie_id, genre_id)
+                    VALUES (%s, %s)
+                    ON DUPLICATE KEY UPDATE movie_id = movie_id
+                """, genre_values)
+        conn.commit()
+    except pymysql.MySQLError as e:
+        print(f"Error bulk upserting {len(movies)} movies: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    # 추천용 인덱스에 반영 (이미 있던 영화의 바뀐 overview는 rebuild 때 반영)
+    for movie in movies:
+        if movie['id'] in movie_id_of:
+            content_index.add_movie_genres(movie_id_of[movie['id']], [genre['id'] for genre in movie.get('genres') or []])
+    content_index.add_movies([
+        {'movie_id': movie_id_of[movie['id']], 'movie_name': values[0], 'overview_tokens': tokens, 'tmdb_id': movie['id']}
+        for movie, values, tokens in zip(movies, movie_values, overview_tokens) if movie['id'] in movie_id_of
+    ])
+    return len(movies)
+
+
+def upsert_movie_with_genres(tmdb_data, tmdb_credits=None):
+    """
+    영화와 장르를 한 커넥션, 한 트랜잭션으로 저장하고 movie_id를 반환합니다.
+    존재 여부를 먼저 조회하지 않고 INSERT ... ON DUPLICATE KEY UPDATE로 처리합니다.
+    (MOVIE.tmdb_id에 UNIQUE 인덱스가 필요합니다.)
+    """
+    if not tmdb_data or not tmdb_data.get('id'):
+        print("TMDB ID가 없습니다.")
+        return None
+    if tmdb_credits is None:
+        tmdb_credits = tmdb_data.get('credits') or {}
+    # 형태소 분석(첫 호출 시 JVM 기동 포함)은 커넥션을 빌리기 전에 끝내 둡니다.
+    overview_tokens = _overview_tokens(tmdb_data)
+    conn = get_db_connection()
+    if not conn:
+        print("Database connection failed.")
+        return None
+    try:
+        with conn.cursor() as cur:
+            # 이미 있는 영화면 LAST_INSERT_ID(movie_id)로 기존 movie_id를 돌려받습니다. (기존 행과 저장된 토큰은 그대로)
+            cur.execute("""
+                INSERT INTO MOVIE (movie_name, tmdb_id, original_title, release_date, runtime, overview, director, cast, production_company, overview_tokens)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE movie_id = LAST_INSERT_ID(movie_id)
+            """, (*_movie_values(tmdb_data, tmdb_credits), overview_tokens))
             movie_id = cur.lastrowid
-            genres = tmdb_data.get('genres', [])
-            insert_movie_genres(movie_id, genres)  # 장르 삽입
-            conn.commit()
-            return movie_id
+            inserted = cur.rowcount == 1
+
+            genre_ids = [genre['id'] for genre in tmdb_data.get('genres') or []]
+            if genre_ids:
+                # executemany는 여러 행을 하나의 INSERT 문으로 묶어 보냅니다.
+                cur.executemany("""
+                    INSERT INTO movie_genre (movie_id, genre_id)
+                    VALUES (%s, %s)
+                    ON DUPLICATE KEY UPDATE movie_id = movie_id
+                """, [(movie_id, genre_id) for genre_id in genre_ids])
+        conn.commit()
+    except pymysql.MySQLError as e:
+        print(f"Error upserting movie {tmdb_data.get('id')}: {e}")
+        conn.rollback()
+        return None
     finally:
         conn.close()
 
+    # 추천용 인덱스에 반영 (새 영화만 TF-IDF 행 추가)
+    content_index.add_movie_genres(movie_id, genre_ids)
+    if inserted:
+        content_index.add_movie({
+            'movie_id': movie_id,
+            'movie_name': tmdb_data.get('title', 'N/A'),
+            'overview_tokens': overview_tokens,
+            'tmdb_id': tmdb_data['id'],
+        })
+    return movie_id
+
+
+def insert_movie_if_not_exists(tmdb_data=None, tmdb_credits=None):
+    """
+    영화와 장르 데이터를 MOVIE 및 movie_genre 테이블에 저장
+    tmdb_credits를 생략하면 get_tmdb_movie_full 결과에 포함된 'credits'를 사용합니다.
+    """
+    return upsert_movie_with_genres(tmdb_data, tmdb_credits)
+
 
 
 
+# migrate.py verify가 같은 문자열을 EXPLAIN하도록 쓰기 쿼리는 모듈 상수로 둡니다.
+INSERT_REVIEW_SQL = """
+    INSERT INTO REVIEW (user_id, movie_id, review_text, sentiment)
+    VALUES (%s, %s, %s, %s)
+"""
+
+
 def save_review(user_id, movie_id, review_text, sentiment):
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
             # SQL 쿼리 확인
             print(f"Executing: INSERT INTO REVIEW (user_id, movie_id, review_text, sentiment) VALUES ({user_id}, {movie_id}, {review_text}, {sentiment})")
-            cur.execute("""
-                INSERT INTO REVIEW (user_id, movie_id, review_text, sentiment)
-                VALUES (%s, %s, %s, %s)
-            """, (user_id, movie_id, review_text, sentiment))
+            cur.execute(INSERT_REVIEW_SQL, (user_id, movie_id, review_text, sentiment))
+            movie_stats.record_review(cur, movie_id, sentiment)  # 같은 트랜잭션에서 집계 갱신
         conn.commit()  # 꼭 필요
     except Exception as e:
         print(f"Error saving review: {e}")  # 디버깅 로그
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+
+
+def fetch_pending_reviews(limit=1000):
+    """감정 분석이 끝나지 않은('pending') 리뷰를 가져옵니다."""
+    conn = get_db_connection()
+    if not conn:
+        print("Database connection failed.")
+        return []
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT user_id, movie_id, review_text
+                FROM REVIEW
+                WHERE sentiment = 'pending'
+                LIMIT %s
+            """, (limit,))
+            return cur.fetchall()
+    finally:
+        conn.close()
+
+
+# {rows}는 '(%s, %s)'를 리뷰 수만큼 쉼표로 이은 문자열
+LOCK_PENDING_REVIEWS_SQL = """
+    SELECT user_id, movie_id FROM REVIEW
+    WHERE (user_id, movie_id) IN ({rows}) AND sentiment = 'pending'
+    FOR UPDATE
+"""
+UPDATE_REVIEW_SENTIMENT_SQL = "UPDATE REVIEW SET sentiment = %s WHERE user_id = %s AND movie_id = %s"
+
+
+def update_review_sentiments(results):
+    """(user_id, movie_id, sentiment) 목록으로 pending 리뷰의 감정을 일괄 갱신합니다."""
+    if not results:
+        return
+    # 같은 리뷰가 큐에 두 번 들어와 한 배치에 모여도 집계가 두 번 늘지 않도록 리뷰당 하나만 남깁니다.
+    results = list({(user_id, movie_id): (user_id, movie_id, sentiment)
+                    for user_id, movie_id, sentiment in results}.values())
+    conn = get_db_connection()
+    if not conn:
+        raise pymysql.MySQLError("Database connection failed.")
+    try:
+        with conn.cursor() as cur:
+            # 아직 pending인 행만 잠가서 가져오므로, 다른 워커가 같은 리뷰를 먼저 갱신해도 집계가 두 번 늘지 않습니다.
+            cur.execute(LOCK_PENDING_REVIEWS_SQL.format(rows=', '.join(['(%s, %s)'] * len(results))),
+                        tuple(value for user_id, movie_id, _ in results for value in (user_id, movie_id)))
+            pending = {(row['user_id'], row['movie_id']) for row in cur.fetchall()}
+            updates = [(sentiment, user_id, movie_id) for user_id, movie_id, sentiment in results
+                       if (user_id, movie_id) in pending]
+            if updates:
+                cur.executemany(UPDATE_REVIEW_SENTIMENT_SQL, updates)
+                positive_by_movie = {}
+                for sentiment, _, movie_id in updates:
+                    if sentiment == 'positive':
+                        positive_by_movie[movie_id] = positive_by_movie.get(movie_id, 0) + 1
+                movie_stats.add_positive_counts(cur, positive_by_movie)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_review_sentiment(user_id, movie_id):
+    """리뷰의 현재 감정('positive', 'negative', 'pending')을 반환합니다. 리뷰가 없으면 None."""
+    conn = get_db_connection()
+    if not conn:
+        print("Database connection failed.")
+        return None
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT sentiment FROM REVIEW WHERE user_id = %s AND movie_id = %s", (user_id, movie_id))
+            row = cur.fetchone()
+            return row['sentiment'] if row else None
     finally:
         conn.close()
 
@@ -169,14 +389,16 @@ def verify_user(user_id, password):
         conn.close()
 
 
+USER_EXISTS_SQL = "SELECT user_id FROM USER WHERE user_id = %s"
+
+
 def create_user(user_id, password, username):
     """새로운 사용자를 생성하고 비밀번호를 해싱하여 저장"""
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
             # user_id가 이미 존재하는지 확인
-            check_sql = "SELECT user_id FROM USER WHERE user_id = %s"
-            cur.execute(check_sql, (user_id,))
+            cur.execute(USER_EXISTS_SQL, (user_id,))
             existing_user = cur.fetchone()
             if existing_user:
                 raise ValueError("이미 존재하는 사용자 아이디입니다.")
@@ -215,6 +437,13 @@ def check_review_exists(user_id, movie_id):
         conn.close()
 
 
+def _fetch_movies_for_index(cur, movie_ids):
+    placeholders = ', '.join(['%s'] * len(movie_ids))
+    cur.execute(f"SELECT movie_id, movie_name, overview_tokens, tmdb_id FROM MOVIE WHERE movie_id IN ({placeholders})",
+                tuple(movie_ids))
+    return cur.fetchall()
+
+
 def recommend_movies_based_on_genre_and_overview(selected_movie_id, limit=5):
     """
     선택한 영화와 같은 장르와 유사한 overview를 가진 영화를 추천
@@ -222,77 +451,123 @@ def recommend_movies_based_on_genre_and_overview(selected_movie_id, limit=5):
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
-            # 선택한 영화의 장르 ID 가져오기
-            cur.execute("""
-                SELECT genre_id
-                FROM movie_genre
-                WHERE movie_id = %s
-            """, (selected_movie_id,))
-            genres = cur.fetchall()
-            if not genres:
+            # 메모리의 장르 역색인에서 후보 찾기 (역색인에 없는 영화만 DB에서 장르 조회)
+            genre_index = content_index.get_genre_index(cur)
+            genre_ids = genre_index.genres_of(selected_movie_id)
+            if not genre_ids:
+                cur.execute("SELECT genre_id FROM movie_genre WHERE movie_id = %s", (selected_movie_id,))
+                genre_ids = [genre['genre_id'] for genre in cur.fetchall()]
+                if not genre_ids:
+                    return []
+                genre_index.add(selected_movie_id, genre_ids)
+            candidate_ids = genre_index.candidates(genre_ids, exclude=selected_movie_id)
+            if len(candidate_ids) == 0:
                 return []
 
-            # 선택한 영화의 overview 가져오기
-            cur.execute("SELECT overview FROM MOVIE WHERE movie_id = %s", (selected_movie_id,))
-            selected_movie = cur.fetchone()
-            if not selected_movie or not selected_movie['overview']:
-                return []
+            # 다른 프로세스에서 추가되어 아직 TF-IDF 인덱스에 없는 영화만 가져와 반영
+            index = content_index.get_content_index(cur)
+            missing_ids = index.unknown(np.append(candidate_ids, selected_movie_id))
+            if missing_ids:
+                content_index.add_movies(_fetch_movies_for_index(cur, missing_ids))
 
-            genre_ids = [genre['genre_id'] for genre in genres]
-            genre_placeholders = ', '.join(['%s'] * len(genre_ids))
-
-            # 장르에 해당하는 영화 목록 가져오기
-            cur.execute(f"""
-                SELECT DISTINCT m.movie_id, m.movie_name, m.overview, m.tmdb_id
-                FROM MOVIE m
-                JOIN movie_genre mg ON m.movie_id = mg.movie_id
-                WHERE mg.genre_id IN ({genre_placeholders}) AND m.movie_id != %s
-            """, (*genre_ids, selected_movie_id))
-            movies = cur.fetchall()
-            if not movies:
+            # 후보 행만 유사도를 계산해 상위 limit개 선택
+            recommended_movies = []
+            for movie_id, score in index.similar(selected_movie_id, candidate_ids, limit):
+                recommended_movies.append({'movie_id': movie_id, **index.info[movie_id]})
+            return recommended_movies
+    finally:
+        conn.close()
+
+def recommend_movies_for_user(user_id, limit=5):
+    """
+    사용자가 남긴 리뷰 감정으로 협업 필터링 추천 (미리 계산한 이웃 표 사용)
+    이웃 표가 없거나 추천할 영화가 없으면 빈 목록을 반환합니다.
+    """
+    table = cf_recommender.get_neighbor_table()
+    if table is None:
+        return []
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT movie_id, sentiment FROM REVIEW WHERE user_id = %s", (user_id,))
+            ratings = {
+                review['movie_id']: cf_recommender.SENTIMENT_VALUES[review['sentiment']]
+                for review in cur.fetchall() if review['sentiment'] in cf_recommender.SENTIMENT_VALUES
+            }
+            movie_ids = [movie_id for movie_id, _ in table.recommend(ratings, limit)]
+            if not movie_ids:
                 return []
+            by_id = {movie['movie_id']: movie for movie in _fetch_movies_for_index(cur, movie_ids)}
+            return [
+                {'movie_id': movie_id, 'movie_name': by_id[movie_id]['movie_name'], 'tmdb_id': by_id[movie_id]['tmdb_id']}
+                for movie_id in movie_ids if movie_id in by_id
+            ]
+    finally:
+        conn.close()
 
-            # TF-IDF 계산
-            overviews = [movie['overview'] for movie in movies]
-            tfidf_vectorizer = TfidfVectorizer(stop_words='english')
-            tfidf_matrix = tfidf_vectorizer.fit_transform(overviews)
 
-            # 선택한 영화의 TF-IDF 계산
-            selected_tfidf = tfidf_vectorizer.transform([selected_movie['overview']])
-            cosine_sim = cosine_similarity(selected_tfidf, tfidf_matrix).flatten()
+def get_movie_stats(movie_ids):
+    """{movie_id: 리뷰 수, 긍정 리뷰 수, 마지막 리뷰 시각}을 반환합니다. 리뷰가 없는 영화는 빠집니다."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            return movie_stats.get_stats(cur, list(movie_ids))
+    finally:
+        conn.close()
 
-            # 유사도 기준 정렬
-            similarity_scores = list(enumerate(cosine_sim))
-            similarity_scores = sorted(similarity_scores, key=lambda x: x[1], reverse=True)
 
-            # 가장 유사한 영화 추천
-            recommended_movies = []
-            for idx, score in similarity_scores[:limit]:
-                recommended_movies.append(movies[idx])
-            return recommended_movies
+def get_popular_movies(limit=10):
+    """긍정 리뷰가 많은 순으로 영화를 반환합니다. (movie_stats 집계 사용)"""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            return movie_stats.popular_movies(cur, limit)
+    finally:
+        conn.close()
+
+
+def recommend_popular_movies(limit=5, exclude_movie_id=None):
+    """
+    인기 영화 상위 POPULAR_POOL_SIZE편 중에서 무작위로 limit개를 추천 (부정 리뷰 시 대체 추천)
+    인기 영화가 부족하면 전체 영화 목록에서 무작위로 채웁니다.
+    """
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            pool = [movie for movie in movie_stats.popular_movies(cur, POPULAR_POOL_SIZE)
+                    if movie['movie_id'] != exclude_movie_id]
+            return movie_sampler.pick_movies(cur, limit, pool)
     finally:
         conn.close()
 
+
 def recommend_random_movies(limit=5):
-    """영화 목록에서 평점 높은 영화 중 랜덤으로 5개를 추천"""
+    """영화 목록에서 랜덤으로 5개를 추천 (ORDER BY RAND() 없이 캐시된 ID 목록에서 균등 추출)"""
     conn = get_db_connection()
     try:
         with conn.cursor() as cur:
-            # 평점이 높은 영화 중 5개를 랜덤으로 추천
-            cur.execute("""
-                SELECT movie_id, movie_name, tmdb_id
-                FROM movie_list
-                ORDER BY RAND()
-                LIMIT %s
-            """, (limit,))
-            movies = cur.fetchall()
-            return movies
+            return movie_sampler.sample_movies(cur, limit)
+    finally:
+        conn.close()
+
+
+def get_todays_picks(limit=5):
+    """오늘의 추천 영화 (인기 영화 중에서 하루에 한 번 뽑아 캐시)"""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            return movie_sampler.todays_picks(cur, limit, lambda: movie_stats.popular_movies(cur, POPULAR_POOL_SIZE))
     finally:
         conn.close()
         
         
 def insert_movie_genres(movie_id, genres):
-    """영화와 관련된 장르를 movie_genre 테이블에 삽입"""
+    """
+    영화와 관련된 장르를 movie_genre 테이블에 삽입
+    genres에는 장르 목록이나 get_tmdb_movie_full 결과(딕셔너리)를 그대로 넘길 수 있습니다.
+    """
+    if isinstance(genres, dict):
+        genres = genres.get('genres') or []
     conn = get_db_connection()
     if not conn:
         print("Database connection failed.")
@@ -308,9 +583,14 @@ def insert_movie_genres(movie_id, genres):
             values = [(movie_id, genre['id']) for genre in genres]
             cur.executemany(sql, values)  # 일괄 처리
             conn.commit()  # 명시적으로 커밋
+            content_index.add_movie_genres(movie_id, [genre['id'] for genre in genres])
             print(f"Inserted genres for movie_id {movie_id}: {[genre['id'] for genre in genres]}")
     except pymysql.MySQLError as e:
         print(f"Error inserting genres for movie_id {movie_id}: {e}")
         conn.rollback()  # 오류 발생 시 롤백
     finally:
-        conn.close()
\ No newline at end of file
+        conn.close()
+
+
+# 모든 공개 함수의 실행 시간을 'checkdb.<함수 이름>' 단계로 기록
+instrument_module(sys.modules[__name__], 'checkdb')
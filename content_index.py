@@ -0,0 +1,467 @@
+import argparse
+import os
+import pickle
+import threading
+import time
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# 영화 overview의 TF-IDF 행렬을 미리 계산해 디스크에 저장하고, 프로세스당 한 번만 로드합니다.
+# overview는 수집 시 Okt로 형태소 분석해 MOVIE.overview_tokens에 저장해 두므로, 여기서는 공백으로만 나눕니다.
+# 새 영화는 기존 어휘/IDF로 변환해 행으로 추가하고, 어휘를 만든 뒤 추가된 영화가 많아지면 백그라운드에서 다시 맞춥니다.
+# 디스크 저장과 재생성은 요청 스레드가 아닌 백그라운드 스레드에서 합니다.
+INDEX_PATH = 'models/tfidf_index.pkl'
+INDEX_VERSION = 2  # 인덱스 형식이나 토큰화 방식이 바뀌면 올려서 디스크의 인덱스를 다시 만들게 함
+SAVE_EVERY = 20  # 새 영화가 이만큼 추가될 때마다 디스크에 저장
+REFIT_RATIO = float(os.getenv('CONTENT_INDEX_REFIT_RATIO', 0.2))  # 어휘를 만든 뒤 이 비율 이상 추가되면 다시 만듦
+RELOAD_CHECK_INTERVAL = 60.0  # 다른 프로세스(rebuild, 수집 도구)가 인덱스 파일을 바꿨는지 확인하는 주기(초)
+
+
+class ContentIndex:
+    """
+    영화별 TF-IDF 행(L2 정규화)을 가진 희소 행렬입니다. 코사인 유사도는 행렬-벡터 곱 한 번으로 계산됩니다.
+    """
+
+    def __init__(self, vectorizer, matrix, movies, fitted_rows=None, without_overview=()):
+        self.vectorizer = vectorizer
+        self.matrix = matrix.tocsr()
+        self.movie_ids = [movie['movie_id'] for movie in movies]
+        self.fitted_rows = len(self.movie_ids) if fitted_rows is None else fitted_rows  # 어휘/IDF를 만든 영화 수
+        self.info = {movie['movie_id']: {'movie_name': movie['movie_name'], 'tmdb_id': movie['tmdb_id']}
+                     for movie in movies}
+        self.row_of = {movie_id: row for row, movie_id in enumerate(self.movie_ids)}
+        self._row_lookup = None
+        self._without_overview = set(without_overview)  # overview 토큰이 없어 행이 없는 영화 (다시 조회하지 않도록 기록)
+        self._pending = []
+        self._unsaved = 0
+        self._lock = threading.RLock()
+
+    @classmethod
+    def build(cls, movies):
+        """
+        영화 목록(movie_id, movie_name, overview_tokens, tmdb_id)으로 인덱스를 새로 만듭니다.
+        토큰이 없는 영화는 행을 만들지 않고 기록만 해 두어, 추천 후보로 나올 때마다 DB에서 다시 가져오지 않게 합니다.
+        """
+        without_overview = [movie['movie_id'] for movie in movies if not movie.get('overview_tokens')]
+        movies = [movie for movie in movies if movie.get('overview_tokens')]
+        # 토큰은 Okt 분석과 한국어 불용어 제거가 끝난 상태이므로 공백으로만 나눕니다.
+        vectorizer = TfidfVectorizer(analyzer=str.split)
+        if movies:
+            matrix = vectorizer.fit_transform([movie['overview_tokens'] for movie in movies])
+        else:
+            matrix = sparse.csr_matrix((0, 0))
+        return cls(vectorizer, matrix, movies, without_overview=without_overview)
+
+    def __len__(self):
+        return len(self.movie_ids)
+
+    def __contains__(self, movie_id):
+        return movie_id in self.row_of
+
+    def unknown(self, movie_ids):
+        """인덱스가 아직 한 번도 본 적 없는 movie_id만 골라 반환합니다."""
+        movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        missing = movie_ids[self.rows_for(movie_ids) < 0]
+        return [int(movie_id) for movie_id in missing if int(movie_id) not in self._without_overview]
+
+    def add(self, movie):
+        return self.add_many([movie])
+
+    def add_many(self, movies):
+        """
+        새 영화들을 기존 어휘로 한 번에 변환해 추가합니다. 저장하거나 다시 만들 때가 되면 True를 반환합니다.
+        빈 카탈로그로 만들어져 어휘가 없으면 이번 영화들로 어휘를 만듭니다.
+        """
+        with self._lock:
+            new_movies = []
+            for movie in movies:
+                if not movie.get('overview_tokens'):
+                    self._without_overview.add(movie['movie_id'])
+                elif movie['movie_id'] not in self.row_of:
+                    self.row_of[movie['movie_id']] = len(self.movie_ids)
+                    self.movie_ids.append(movie['movie_id'])
+                    self.info[movie['movie_id']] = {'movie_name': movie['movie_name'], 'tmdb_id': movie['tmdb_id']}
+                    new_movies.append(movie)
+            if not new_movies:
+                return False
+            tokens = [movie['overview_tokens'] for movie in new_movies]
+            if hasattr(self.vectorizer, 'vocabulary_'):
+                self._pending.append(self.vectorizer.transform(tokens))
+            else:
+                self.matrix = self.vectorizer.fit_transform(tokens).tocsr()
+                self.fitted_rows = len(new_movies)
+            self._unsaved += len(new_movies)
+            self._row_lookup = None
+            return self._unsaved >= SAVE_EVERY or self.needs_refit()
+
+    def needs_refit(self):
+        """어휘/IDF를 만든 뒤 추가된 영화가 REFIT_RATIO를 넘었는지 확인합니다."""
+        added = len(self.movie_ids) - self.fitted_rows
+        return added > max(SAVE_EVERY, self.fitted_rows * REFIT_RATIO)
+
+    def _merge_pending(self):
+        # 추가된 행을 매번 vstack하지 않고 조회 시점에 한 번에 합칩니다.
+        if self._pending:
+            self.matrix = sparse.vstack([self.matrix, *self._pending], format='csr')
+            self._pending = []
+
+    def rows_for(self, movie_ids):
+        """movie_id 배열을 행 번호 배열로 바꿉니다. 인덱스에 없는 영화는 -1."""
+        movie_ids = np.asarray(movie_ids, dtype=np.int64)
+        with self._lock:
+            if self._row_lookup is None:
+                # movie_id는 AUTO_INCREMENT 정수이므로 배열 하나로 벡터화된 조회를 합니다.
+                size = max(self.movie_ids, default=-1) + 1
+                self._row_lookup = np.full(size, -1, dtype=np.int64)
+                self._row_lookup[np.asarray(self.movie_ids, dtype=np.int64)] = np.arange(len(self.movie_ids))
+            lookup = self._row_lookup
+        rows = np.full(len(movie_ids), -1, dtype=np.int64)
+        known = (movie_ids >= 0) & (movie_ids < len(lookup))
+        rows[known] = lookup[movie_ids[known]]
+        return rows
+
+    def similar(self, movie_id, candidate_ids=None, limit=5):
+        """
+        movie_id와 overview가 비슷한 영화를 (movie_id, 유사도) 목록으로 반환합니다.
+        후보 행만 점수를 매기고, 전체 정렬 없이 argpartition으로 상위 limit개를 고릅니다.
+        """
+        with self._lock:
+            self._merge_pending()
+            row = self.row_of.get(movie_id)
+            if row is None:
+                return []
+            if candidate_ids is None:
+                rows = np.arange(len(self.movie_ids))
+            else:
+                rows = self.rows_for(candidate_ids)
+                rows = rows[rows >= 0]
+            rows = rows[rows != row]
+            if len(rows) == 0 or limit <= 0:
+                return []
+            scores = (self.matrix[rows] @ self.matrix[row].T).toarray().ravel()
+
+        k = min(limit, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self.movie_ids[rows[i]], float(scores[i])) for i in top]
+
+    def save(self, path=INDEX_PATH):
+        # 잠금 안에서는 상태만 복사하고, 직렬화와 쓰기는 잠금 밖에서 해 조회를 막지 않습니다.
+        with self._lock:
+            self._merge_pending()
+            state = {
+                'version': INDEX_VERSION,
+                'vectorizer': self.vectorizer,
+                'matrix': self.matrix,
+                'movie_ids': list(self.movie_ids),
+                'info': dict(self.info),
+                'fitted_rows': self.fitted_rows,
+                'without_overview': list(self._without_overview),
+            }
+            self._unsaved = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as handle:
+            pickle.dump(state, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        """디스크의 인덱스를 로드합니다. 형식 버전이 다르면 None을 반환합니다."""
+        with open(path, 'rb') as handle:
+            state = pickle.load(handle)
+        if state.get('version') != INDEX_VERSION:
+            return None
+        movies = [{'movie_id': movie_id, **state['info'][movie_id]} for movie_id in state['movie_ids']]
+        return cls(state['vectorizer'], state['matrix'], movies, state.get('fitted_rows'),
+                   state.get('without_overview', ()))
+
+
+class GenreIndex:
+    """
+    장르 ID -> 영화 ID 역색인입니다. 추천 후보를 DB JOIN 없이 메모리에서 바로 찾습니다.
+    """
+
+    def __init__(self, pairs=()):
+        self._genre_to_movies = {}
+        self._movie_to_genres = {}
+        self._arrays = {}
+        self._lock = threading.Lock()
+        for pair in pairs:
+            self._add_pair(pair['movie_id'], pair['genre_id'])
+
+    def _add_pair(self, movie_id, genre_id):
+        genres = self._movie_to_genres.setdefault(movie_id, set())
+        if genre_id not in genres:
+            genres.add(genre_id)
+            self._genre_to_movies.setdefault(genre_id, []).append(movie_id)
+            self._arrays.pop(genre_id, None)
+
+    def add(self, movie_id, genre_ids):
+        with self._lock:
+            for genre_id in genre_ids:
+                self._add_pair(movie_id, genre_id)
+
+    def genres_of(self, movie_id):
+        return set(self._movie_to_genres.get(movie_id, ()))
+
+    def candidates(self, genre_ids, exclude=None):
+        """주어진 장르 중 하나라도 속한 영화 ID 배열을 반환합니다."""
+        with self._lock:
+            arrays = []
+            for genre_id in genre_ids:
+                array = self._arrays.get(genre_id)
+                if array is None and genre_id in self._genre_to_movies:
+                    array = self._arrays[genre_id] = np.asarray(self._genre_to_movies[genre_id], dtype=np.int64)
+                if array is not None:
+                    arrays.append(array)
+        if not arrays:
+            return np.zeros(0, dtype=np.int64)
+        movie_ids = np.unique(np.concatenate(arrays))
+        if exclude is not None:
+            movie_ids = movie_ids[movie_ids != exclude]
+        return movie_ids
+
+
+GENRE_INDEX_TTL = 300.0  # 다른 프로세스에서 추가된 장르를 반영하기 위해 다시 읽는 주기(초)
+_genre_index = None
+_genre_index_loaded_at = 0.0
+_genre_index_lock = threading.Lock()
+_genre_refresh_adds = None  # 백그라운드에서 다시 읽는 동안 add_movie_genres로 들어온 (movie_id, genre_ids)
+
+
+def _load_genre_pairs(cur):
+    cur.execute("SELECT movie_id, genre_id FROM movie_genre")
+    return cur.fetchall()
+
+
+def get_genre_index(cur):
+    """
+    공유 장르 역색인을 반환합니다. 처음 한 번만 요청 스레드에서 movie_genre를 읽고,
+    GENRE_INDEX_TTL이 지나면 백그라운드 스레드가 다시 읽는 동안 이전 역색인을 그대로 사용합니다.
+    """
+    global _genre_index, _genre_index_loaded_at
+    if _genre_index is None:
+        with _genre_index_lock:
+            if _genre_index is None:
+                _genre_index = GenreIndex(_load_genre_pairs(cur))
+                _genre_index_loaded_at = time.monotonic()
+    elif time.monotonic() - _genre_index_loaded_at > GENRE_INDEX_TTL:
+        _schedule_genre_refresh()
+    return _genre_index
+
+
+def _schedule_genre_refresh():
+    global _genre_refresh_adds
+    with _genre_index_lock:
+        if _genre_refresh_adds is not None:
+            return  # 이미 다시 읽는 중
+        _genre_refresh_adds = []
+    threading.Thread(target=_refresh_genre_index, name='genre-index-refresh', daemon=True).start()
+
+
+def _refresh_genre_index():
+    global _genre_index, _genre_index_loaded_at, _genre_refresh_adds
+    index = None
+    try:
+        from checkdb import get_db_connection
+        conn = get_db_connection()
+        if not conn:
+            print("Database connection failed.")
+            return
+        try:
+            with conn.cursor() as cur:
+                index = GenreIndex(_load_genre_pairs(cur))
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"Error refreshing genre index: {e}")
+    finally:
+        with _genre_index_lock:
+            if index is not None:
+                # 읽는 동안 이 프로세스에서 추가된 장르를 새 역색인에도 반영
+                for movie_id, genre_ids in _genre_refresh_adds:
+                    index.add(movie_id, genre_ids)
+                _genre_index = index
+            # 실패해도 다음 TTL까지는 이전 역색인을 사용
+            _genre_index_loaded_at = time.monotonic()
+            _genre_refresh_adds = None
+
+
+def add_movie_genres(movie_id, genre_ids):
+    """movie_genre에 새로 들어간 장르를 역색인에 반영합니다. (아직 로드 전이면 다음 로드 때 반영)"""
+    with _genre_index_lock:
+        if _genre_index is not None:
+            _genre_index.add(movie_id, genre_ids)
+        if _genre_refresh_adds is not None:
+            _genre_refresh_adds.append((movie_id, list(genre_ids)))
+
+
+# 토큰이 없는 영화도 함께 읽어 build에서 '토큰 없음'으로 기록합니다.
+FETCH_CATALOG_SQL = "SELECT movie_id, movie_name, overview_tokens, tmdb_id FROM MOVIE"
+
+
+def fetch_catalog(cur):
+    cur.execute(FETCH_CATALOG_SQL)
+    return cur.fetchall()
+
+
+_index = None
+_index_mtime = None
+_index_checked_at = None
+_index_lock = threading.Lock()
+
+
+def _path_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def get_content_index(cur):
+    """
+    공유 인덱스를 반환합니다. 디스크에 없으면 카탈로그로 새로 만들어 저장합니다.
+    다른 프로세스가 파일을 다시 만들면 RELOAD_CHECK_INTERVAL 안에 새 파일로 바꿉니다.
+    """
+    global _index, _index_mtime, _index_checked_at
+    if _index is not None and time.monotonic() - _index_checked_at < RELOAD_CHECK_INTERVAL:
+        return _index
+    with _index_lock:
+        if _index is None or time.monotonic() - _index_checked_at >= RELOAD_CHECK_INTERVAL:
+            mtime = _path_mtime(INDEX_PATH)
+            if _index is None or (mtime is not None and mtime != _index_mtime):
+                index = ContentIndex.load(INDEX_PATH) if mtime is not None else None
+                if index is None:
+                    index = ContentIndex.build(fetch_catalog(cur))
+                    index.save(INDEX_PATH)
+                    mtime = _path_mtime(INDEX_PATH)
+                _index = index
+            _index_mtime = mtime
+            _index_checked_at = time.monotonic()
+    return _index
+
+
+def add_movies(movies):
+    """
+    MOVIE에 새로 들어간 영화들을 인덱스에 한 번에 반영합니다.
+    인덱스가 아직 로드되지 않았으면 건너뜁니다. (추천 시 인덱스에 없는 영화는 DB에서 보충)
+    저장이나 재생성이 필요하면 백그라운드 스레드에 맡기고 바로 돌아갑니다.
+    """
+    index = _index
+    if index is not None and movies and index.add_many(movies):
+        _schedule_maintenance()
+
+
+def add_movie(movie):
+    add_movies([movie])
+
+
+_maintenance_lock = threading.Lock()
+_maintenance_running = False
+
+
+def _schedule_maintenance():
+    global _maintenance_running
+    with _maintenance_lock:
+        if _maintenance_running:
+            return
+        _maintenance_running = True
+    threading.Thread(target=_run_maintenance, name='content-index-maintenance', daemon=True).start()
+
+
+def _run_maintenance():
+    """추가된 영화가 많으면 카탈로그로 인덱스를 다시 만들고, 아니면 현재 인덱스를 저장합니다."""
+    global _index_mtime, _maintenance_running
+    try:
+        index = _index
+        if index is None:
+            return
+        if index.needs_refit():
+            from checkdb import get_db_connection
+            conn = get_db_connection()
+            if not conn:
+                print("Database connection failed.")
+                return
+            try:
+                with conn.cursor() as cur:
+                    rebuild_index(cur)
+            finally:
+                conn.close()
+        else:
+            index.save(INDEX_PATH)
+            with _index_lock:
+                _index_mtime = _path_mtime(INDEX_PATH)
+    except Exception as e:
+        print(f"Error saving content index: {e}")
+    finally:
+        with _maintenance_lock:
+            _maintenance_running = False
+
+
+def rebuild_index(cur):
+    """현재 카탈로그로 어휘와 IDF를 다시 맞춰 인덱스를 새로 만듭니다."""
+    global _index, _index_mtime, _index_checked_at
+    index = ContentIndex.build(fetch_catalog(cur))
+    index.save(INDEX_PATH)
+    with _index_lock:
+        _index = index
+        _index_mtime = _path_mtime(INDEX_PATH)
+        _index_checked_at = time.monotonic()
+    print(f"TF-IDF 인덱스 재생성 완료: {len(index)}편 -> {INDEX_PATH}")
+    return index
+
+
+BACKFILL_BATCH_SIZE = 200
+UPDATE_OVERVIEW_TOKENS_SQL = "UPDATE MOVIE SET overview_tokens = %s WHERE movie_id = %s"
+
+
+def backfill_overview_tokens(cur, conn, batch_size=BACKFILL_BATCH_SIZE):
+    """overview_tokens가 아직 없는(NULL) MOVIE 행의 토큰을 계산해 채웁니다. 묶음마다 커밋하므로 중단 후 다시 실행하면 이어서 처리됩니다."""
+    from lstm_model import tokenize_overview
+
+    total = 0
+    started = time.perf_counter()
+    last_movie_id = 0
+    while True:
+        cur.execute("""
+            SELECT movie_id, overview
+            FROM MOVIE
+            WHERE movie_id > %s AND overview_tokens IS NULL
+            ORDER BY movie_id
+            LIMIT %s
+        """, (last_movie_id, batch_size))
+        rows = cur.fetchall()
+        if not rows:
+            break
+        cur.executemany(UPDATE_OVERVIEW_TOKENS_SQL, [
+            (tokenize_overview(row['overview']), row['movie_id']) for row in rows
+        ])
+        conn.commit()
+        last_movie_id = rows[-1]['movie_id']
+        total += len(rows)
+        elapsed = time.perf_counter() - started
+        print(f"overview 토큰 누적 {total}편 ({total / elapsed:.1f} movies/s)")
+    print(f"overview 토큰 백필 완료: {total}편")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="영화 overview TF-IDF 인덱스 관리")
+    parser.add_argument('command', choices=['rebuild', 'backfill'],
+                        help="backfill: 기존 영화의 overview 토큰을 채운 뒤 인덱스를 다시 만듭니다.")
+    args = parser.parse_args()
+
+    from checkdb import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            if args.command == 'backfill':
+                backfill_overview_tokens(cur, conn)
+            rebuild_index(cur)
+    finally:
+        conn.close()
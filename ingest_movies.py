@@ -0,0 +1,145 @@
+import argparse
+import inspect
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import content_index
+from checkdb import bulk_upsert_movies, get_db_connection
+from utils.api_fetch import get_tmdb_movie_full, get_tmdb_movie_list_page, TMDB_LIST_ENDPOINTS
+from utils.tmdb_cache import NotFound
+
+# TMDB 영화 목록을 페이지 단위로 받아 movie_list, MOVIE, movie_genre에 일괄 저장하는 수집 도구
+# 페이지마다 체크포인트를 남기므로 중단되어도 같은 명령을 다시 실행하면 이어서 수집합니다. (처음부터 다시 하려면 --restart)
+CHECKPOINT_PATH = 'data/ingest_checkpoint.json'
+TMDB_MAX_PAGE = 500  # TMDB 목록 API가 허용하는 최대 페이지
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, checkpoint):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def checkpoint_key(source, extra_params):
+    # discover처럼 조건이 다른 수집은 따로 진행 상황을 기록합니다.
+    if not extra_params:
+        return source
+    return source + '?' + '&'.join(f"{k}={v}" for k, v in sorted(extra_params.items()))
+
+
+def _fetch_full(tmdb_id):
+    # 대량 수집 결과로 화면용 응답 캐시를 채우지 않도록 캐시를 거치지 않고 요청합니다.
+    # 캐시 데코레이터가 처리하던 404(NotFound)도 여기서 받아, 영화 하나 때문에 페이지 전체가 실패하지 않게 합니다.
+    try:
+        return inspect.unwrap(get_tmdb_movie_full)(tmdb_id)
+    except NotFound:
+        print(f"TMDB에 없는 영화를 건너뜁니다: {tmdb_id}")
+        return None
+    except requests.exceptions.RequestException as e:
+        print(f"TMDB API 요청 중 오류 발생: {e}")
+        return None
+
+
+def fetch_page(executor, source, page, extra_params):
+    """목록 한 페이지와 그 페이지 영화들의 세부 정보를 가져옵니다. (세부 정보는 동시에 요청)"""
+    listing = get_tmdb_movie_list_page(source, page, **extra_params)
+    if listing is None:
+        raise RuntimeError(f"{source} {page}페이지를 가져오지 못했습니다.")
+    tmdb_ids = [movie['id'] for movie in listing.get('results', []) if not movie.get('adult')]
+    details = list(executor.map(_fetch_full, tmdb_ids))
+    return listing.get('total_pages', page), [movie for movie in details if movie]
+
+
+def ingest(source, start_page, end_page, workers, checkpoint_path, extra_params):
+    checkpoint = load_checkpoint(checkpoint_path)
+    key = checkpoint_key(source, extra_params)
+    progress = checkpoint.setdefault(key, {'last_page': start_page - 1, 'rows': 0})
+
+    rows = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ingest') as executor, \
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix='ingest-page') as page_executor:
+        page = progress['last_page'] + 1
+        if page > end_page:
+            print(f"[{key}] 이미 {progress['last_page']}페이지까지 수집되었습니다.")
+            return 0
+        # 현재 페이지를 저장하는 동안 다음 페이지를 미리 받아 둡니다.
+        pending = page_executor.submit(fetch_page, executor, source, page, extra_params)
+        while pending is not None:
+            total_pages, movies = pending.result()
+            last_page = min(end_page, total_pages, TMDB_MAX_PAGE)
+            next_page = page + 1
+            pending = page_executor.submit(fetch_page, executor, source, next_page, extra_params) \
+                if next_page <= last_page else None
+
+            saved = bulk_upsert_movies(movies)
+            rows += saved
+            progress['last_page'] = page
+            progress['rows'] += saved
+            save_checkpoint(checkpoint_path, checkpoint)
+
+            elapsed = time.perf_counter() - started
+            print(f"[{key}] {page}/{last_page}페이지: {saved}편 저장, 누적 {rows}편, {rows / elapsed:.1f} rows/s")
+            page = next_page
+
+    elapsed = time.perf_counter() - started
+    print(f"[{key}] 수집 완료: {rows}편, {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.1f} rows/s)")
+    return rows
+
+
+def _parse_params(values):
+    params = {}
+    for value in values or []:
+        name, _, param = value.partition('=')
+        params[name] = param
+    return params
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TMDB 영화 목록을 DB로 일괄 수집")
+    parser.add_argument('--source', choices=sorted(TMDB_LIST_ENDPOINTS), default='popular')
+    parser.add_argument('--start-page', type=int, default=1)
+    parser.add_argument('--end-page', type=int, default=TMDB_MAX_PAGE)
+    parser.add_argument('--workers', type=int, default=8, help="세부 정보 동시 요청 수")
+    parser.add_argument('--param', action='append', help="추가 쿼리 파라미터 (예: --param sort_by=vote_count.desc)")
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PATH)
+    parser.add_argument('--restart', action='store_true', help="체크포인트를 무시하고 처음부터 수집")
+    parser.add_argument('--skip-index-rebuild', action='store_true', help="수집 후 TF-IDF 인덱스를 다시 만들지 않음")
+    args = parser.parse_args()
+
+    extra = _parse_params(args.param)
+    if args.restart:
+        checkpoint = load_checkpoint(args.checkpoint)
+        checkpoint.pop(checkpoint_key(args.source, extra), None)
+        save_checkpoint(args.checkpoint, checkpoint)
+
+    try:
+        rows = ingest(args.source, args.start_page, args.end_page, args.workers, args.checkpoint, extra)
+    except KeyboardInterrupt:
+        print("중단되었습니다. 같은 명령으로 다시 실행하면 마지막 체크포인트부터 이어서 수집합니다.")
+        sys.exit(130)
+
+    if rows and not args.skip_index_rebuild:
+        # 새로 수집한 영화까지 포함해 TF-IDF 어휘를 다시 맞춥니다. (실행 중인 앱은 파일이 바뀌면 다시 로드)
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                content_index.rebuild_index(cur)
+        finally:
+            conn.close()
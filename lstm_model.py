@@ -1,82 +1,627 @@
+import argparse
+import hashlib
+import multiprocessing
+import os
+import queue
 import re
+import sqlite3
+import threading
+import time
 import numpy as np
-from tensorflow.keras.models import Sequential, load_model
-from tensorflow.keras.layers import Embedding, LSTM, Dense
-from tensorflow.keras.preprocessing.text import Tokenizer
-from tensorflow.keras.preprocessing.sequence import pad_sequences
 import pickle
+from concurrent.futures import Future
 from konlpy.tag import Okt
+from utils.lru_cache import LRUCache
+from utils.tracing import span, traced
 
-# 전처리 도구 및 불용어 정의
-okt = Okt()
+# 전처리 도구 및 불용어 정의 (Okt는 JVM을 띄우므로 처음 사용할 때 생성)
+_okt = None
+_okt_lock = threading.Lock()
 stopwords = ['은', '는', '이', '가', '을', '를', '들', '에', '와', '한', '거', 
              '하다', '있다', '되다', '그', '저', '이렇다', '그렇다', '어떻다', 
              '등', '또', '보다', '때문', '만', '더', '이것', '저것', '같다', '같이']
 
+# 형태소 분석 결과 캐시: 정규화된 텍스트 -> 토큰 목록
+PREPROCESS_CACHE_SIZE = int(os.getenv('PREPROCESS_CACHE_SIZE', 50000))
+PREPROCESS_DISK_CACHE_PATH = os.getenv('PREPROCESS_DISK_CACHE_PATH')  # 지정하면 SQLite 디스크 캐시 사용
+
+_preprocess_cache = LRUCache(PREPROCESS_CACHE_SIZE)
+_disk_cache_lock = threading.Lock()
+_disk_cache = None
+
+
+def _get_disk_cache():
+    global _disk_cache
+    if PREPROCESS_DISK_CACHE_PATH and _disk_cache is None:
+        with _disk_cache_lock:
+            if _disk_cache is None:
+                conn = sqlite3.connect(PREPROCESS_DISK_CACHE_PATH, check_same_thread=False)
+                conn.execute("CREATE TABLE IF NOT EXISTS morphs (text TEXT PRIMARY KEY, tokens TEXT NOT NULL)")
+                conn.commit()
+                _disk_cache = conn
+    return _disk_cache
+
+
+def get_okt():
+    """프로세스마다 하나의 Okt 인스턴스를 반환합니다."""
+    global _okt
+    if _okt is None:
+        with _okt_lock:
+            if _okt is None:
+                _okt = Okt()
+    return _okt
+
+
+def normalize_text(text):
+    """한글과 공백만 남기고 연속된 공백을 하나로 합칩니다."""
+    text = re.sub(r'[^가-힣\s]', '', text)  # 한글 및 공백 제외 문자 제거
+    return ' '.join(text.split())
+
+
+def _analyze(text, analyzer=None):
+    tokens = (analyzer or get_okt()).morphs(text, stem=True)
+    return [word for word in tokens if word not in stopwords]
+
+
+def tokenize_text(text):
+    """정규화된 텍스트의 형태소 토큰 목록을 캐시를 거쳐 반환합니다."""
+    key = normalize_text(text)
+    tokens = _preprocess_cache.get(key)
+    if tokens is not None:
+        return tokens
+
+    disk = _get_disk_cache()
+    if disk is not None:
+        with _disk_cache_lock:
+            row = disk.execute("SELECT tokens FROM morphs WHERE text = ?", (key,)).fetchone()
+        if row is not None:
+            tokens = row[0].split(' ') if row[0] else []
+            _preprocess_cache.put(key, tokens)
+            return tokens
+
+    tokens = _analyze(key)
+    _preprocess_cache.put(key, tokens)
+    if disk is not None:
+        with _disk_cache_lock:
+            disk.execute("INSERT OR REPLACE INTO morphs (text, tokens) VALUES (?, ?)", (key, ' '.join(tokens)))
+            disk.commit()
+    return tokens
+
+
 # 텍스트 전처리 함수
 def preprocess_text(text):
-    text = re.sub(r'[^가-힣\s]', '', text)  # 한글 및 공백 제외 문자 제거
-    tokens = okt.morphs(text, stem=True)
-    tokens = [word for word in tokens if word not in stopwords]
-    return ' '.join(tokens)
+    return ' '.join(tokenize_text(text))
+
+
+def tokenize_overview(text):
+    """
+    영화 overview를 추천용 토큰 문자열(공백 구분)로 만듭니다. 리뷰 전처리와 같은 Okt 파이프라인을 쓰지만,
+    영화 수집 시 한 번만 계산해 저장하므로 리뷰용 캐시는 거치지 않습니다. 한글이 없으면 빈 문자열입니다.
+    """
+    return ' '.join(_analyze(normalize_text(text or '')))
+
+
+def get_preprocess_cache_stats():
+    """형태소 분석 캐시의 적중/실패 통계를 반환합니다."""
+    return _preprocess_cache.stats()
+
+
+_jvm_warmed_up = False
+_model_warmed_up = False
+_warm_up_thread = None
+_warm_up_lock = threading.Lock()
+
+
+def warm_up(load_sentiment_model=False):
+    """
+    JVM 기동과 Okt 사전 로드(및 load_sentiment_model이면 감정 분석 모델 로드)를 미리 수행해
+    배포 후 첫 사용자의 지연을 없앱니다. 각 단계는 프로세스당 한 번만 실행됩니다.
+    """
+    global _jvm_warmed_up, _model_warmed_up
+    if _jvm_warmed_up and (_model_warmed_up or not load_sentiment_model):
+        return 0.0
+    start = time.perf_counter()
+    if not _jvm_warmed_up:
+        _analyze('영화가 정말 재미있었어요')
+        _jvm_warmed_up = True
+    if load_sentiment_model and not _model_warmed_up:
+        get_model_and_tokenizer()
+        _model_warmed_up = True
+    elapsed = time.perf_counter() - start
+    print(f"전처리 워밍업 완료 ({elapsed:.2f}s)")
+    return elapsed
+
+
+def _warm_up_quietly(load_sentiment_model):
+    try:
+        warm_up(load_sentiment_model)
+    except Exception as e:
+        print(f"워밍업 중 오류 발생: {e}")
+
+
+def start_warm_up(load_sentiment_model=False):
+    """warm_up을 백그라운드 스레드에서 실행합니다. 스크립트 실행(요청)을 막지 않습니다. (프로세스당 1회)"""
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=_warm_up_quietly, args=(load_sentiment_model,),
+                                               name='warm-up', daemon=True)
+            _warm_up_thread.start()
+    return _warm_up_thread
+
+# 모델 레지스트리: 프로세스 전체(모든 Streamlit 세션/스레드)에서 한 번만 로드해 공유
+# models/lstm_model.npz가 .h5보다 오래되지 않았으면 TensorFlow 없이 NumPy 엔진으로 추론합니다. (SENTIMENT_ENGINE=keras로 강제 가능)
+MODEL_PATH = 'models/lstm_model.h5'
+NUMPY_MODEL_PATH = 'models/lstm_model.npz'
+TOKENIZER_PATH = 'models/tokenizer.pickle'
+VOCAB_PATH = 'models/vocab.bin'  # 있으면 pickle 대신 메모리 매핑 어휘 파일 사용
+SENTIMENT_ENGINE = os.getenv('SENTIMENT_ENGINE', 'auto')  # auto | numpy | keras
+MAX_LEN = 100
+RELOAD_CHECK_INTERVAL = 5.0  # 디스크 파일 변경 여부를 확인하는 최소 간격(초)
+
+_registry_lock = threading.Lock()
+_registry = {
+    'model': None,
+    'tokenizer': None,
+    'mtimes': None,
+    'checked_at': 0.0,
+    'stats': {'load_count': 0},
+}
+
+
+def _use_numpy_engine():
+    if SENTIMENT_ENGINE == 'auto':
+        # 재학습으로 .h5만 바뀐 경우 이전 가중치의 .npz를 쓰지 않도록 수정 시각을 비교합니다.
+        if not os.path.exists(NUMPY_MODEL_PATH):
+            return False
+        return not os.path.exists(MODEL_PATH) or os.path.getmtime(NUMPY_MODEL_PATH) >= os.path.getmtime(MODEL_PATH)
+    return SENTIMENT_ENGINE == 'numpy'
+
+
+def _model_path():
+    return NUMPY_MODEL_PATH if _use_numpy_engine() else MODEL_PATH
+
+
+def _tokenizer_path():
+    return VOCAB_PATH if os.path.exists(VOCAB_PATH) else TOKENIZER_PATH
+
+
+def _file_mtimes():
+    return (_model_path(), os.path.getmtime(_model_path()), _tokenizer_path(), os.path.getmtime(_tokenizer_path()))
+
+
+def _load_tokenizer(path):
+    if path == VOCAB_PATH:
+        from vocab_index import VocabIndex
+        return VocabIndex(path)
+    with open(path, 'rb') as handle:
+        return pickle.load(handle)
+
+
+class _KerasEngine:
+    """Keras 모델을 NumpyLSTM과 같은 predict(padded) 인터페이스로 감쌉니다."""
+
+    def __init__(self, path):
+        from tensorflow.keras.models import load_model
+        self.model = load_model(path)
+
+    def predict(self, padded):
+        return self.model.predict(padded, batch_size=len(padded), verbose=0)[:, 0]
+
+
+def _load_engine(path):
+    if path == NUMPY_MODEL_PATH:
+        from numpy_lstm import NumpyLSTM
+        return NumpyLSTM(path)
+    return _KerasEngine(path)
+
+
+def _current_rss_bytes():
+    """현재 프로세스의 RSS(바이트)를 반환합니다. 지원하지 않는 플랫폼에서는 None."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+@traced('model.load')
+def _load_into_registry(mtimes):
+    rss_before = _current_rss_bytes()
+    start = time.perf_counter()
+    model = _load_engine(mtimes[0])
+    tokenizer = _load_tokenizer(mtimes[2])
+    elapsed = time.perf_counter() - start
+    rss_after = _current_rss_bytes()
+
+    stats = _registry['stats']
+    _registry.update(model=model, tokenizer=tokenizer, mtimes=mtimes)
+    stats.update(
+        load_count=stats['load_count'] + 1,
+        load_seconds=elapsed,
+        loaded_at=time.time(),
+        rss_bytes=rss_after,
+        rss_delta_bytes=(rss_after - rss_before) if rss_before is not None and rss_after is not None else None,
+        engine='numpy' if mtimes[0] == NUMPY_MODEL_PATH else 'keras',
+        model_file_bytes=os.path.getsize(mtimes[0]),
+        tokenizer_format='vocab' if mtimes[2] == VOCAB_PATH else 'pickle',
+        tokenizer_file_bytes=os.path.getsize(mtimes[2]),
+    )
+    print(f"감정 분석 모델 로드 완료 ({elapsed:.2f}s, 로드 횟수 {stats['load_count']})")
+
+
+def get_model_and_tokenizer():
+    """
+    공유 모델과 토크나이저를 반환합니다.
+    처음 호출될 때 한 번 로드하고, 디스크의 파일이 바뀌면 다시 로드합니다.
+    """
+    now = time.monotonic()
+    if _registry['model'] is not None and now - _registry['checked_at'] < RELOAD_CHECK_INTERVAL:
+        return _registry['model'], _registry['tokenizer']
+
+    with _registry_lock:
+        mtimes = _file_mtimes()
+        if _registry['model'] is None or _registry['mtimes'] != mtimes:
+            _load_into_registry(mtimes)
+        _registry['checked_at'] = time.monotonic()
+        return _registry['model'], _registry['tokenizer']
+
+
+def reload_model():
+    """파일 변경 여부와 상관없이 모델과 토크나이저를 다시 로드합니다."""
+    with _registry_lock:
+        _load_into_registry(_file_mtimes())
+        _registry['checked_at'] = time.monotonic()
+
+
+_version_cache = {}
+
+
+def get_model_version():
+    """
+    현재 모델의 버전(실제로 로드하는 가중치 파일 SHA-256 앞 12자리)을 반환합니다.
+    """
+    path = _model_path()
+    key = (path, os.path.getmtime(path))
+    if key not in _version_cache:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        _version_cache.clear()
+        _version_cache[key] = digest.hexdigest()[:12]
+    return _version_cache[key]
+
+
+def get_model_stats():
+    """모델 로드 시간, 로드 횟수, 메모리 사용량 등을 반환합니다."""
+    with _registry_lock:
+        return dict(_registry['stats'])
+
+
+def _label(score):
+    return "positive" if score > 0.5 else "negative"
+
+
+def predict_sentiment_scores(texts):
+    """여러 리뷰를 한 번에 전처리/토큰화/패딩하고 단일 forward pass로 점수를 계산합니다."""
+    texts = list(texts)
+    if not texts:
+        return np.zeros(0, dtype=np.float32)
+    model, tokenizer = get_model_and_tokenizer()
+    with span('model.preprocess'):
+        preprocessed = [preprocess_text(text) for text in texts]
+    with span('model.tokenize'):
+        sequences = tokenizer.texts_to_sequences(preprocessed)
+        padded = np.stack([pad_sequence(sequence) for sequence in sequences])
+    with span('model.infer'):
+        return model.predict(padded)
+
+
+def predict_sentiments(texts):
+    """여러 리뷰의 감정을 한 번에 분석해 'positive'/'negative' 목록을 반환합니다."""
+    return [_label(score) for score in predict_sentiment_scores(texts)]
+
+
+class MicroBatcher:
+    """
+    여러 세션에서 동시에 들어온 요청을 짧은 시간 동안 모아 한 번의 forward pass로 처리합니다.
+    """
+
+    def __init__(self, max_batch_size=32, max_wait_ms=5):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='sentiment-micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, text):
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def predict(self, text):
+        return self.submit(text).result()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                scores = predict_sentiment_scores([text for text, _ in batch])
+                for (_, future), score in zip(batch, scores):
+                    future.set_result(_label(score))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+
+_micro_batcher = None
+_micro_batcher_lock = threading.Lock()
+
+
+def enable_micro_batching(max_batch_size=32, max_wait_ms=5):
+    """predict_sentiment 호출을 마이크로 배칭으로 처리하도록 설정합니다."""
+    global _micro_batcher
+    with _micro_batcher_lock:
+        if _micro_batcher is None:
+            _micro_batcher = MicroBatcher(max_batch_size, max_wait_ms)
+    return _micro_batcher
+
+
+if os.getenv('SENTIMENT_MICRO_BATCH') == '1':
+    enable_micro_batching(
+        max_batch_size=int(os.getenv('SENTIMENT_MICRO_BATCH_SIZE', 32)),
+        max_wait_ms=float(os.getenv('SENTIMENT_MICRO_BATCH_WAIT_MS', 5)),
+    )
+
 
 # 감정 분석 함수
+@traced('model.predict_sentiment')
 def predict_sentiment(review_text):
-    # 모델 및 토크나이저 로드
-    model = load_model('models/lstm_model.h5')
-    with open('models/tokenizer.pickle', 'rb') as handle:
-        tokenizer = pickle.load(handle)
-
-    # 리뷰 전처리 및 예측 수행
-    preprocessed_text = preprocess_text(review_text)
-    sequence = tokenizer.texts_to_sequences([preprocessed_text])
-    padded_sequence = pad_sequences(sequence, maxlen=100)
-    prediction = model.predict(padded_sequence)[0][0]
-    sentiment = "positive" if prediction > 0.5 else "negative"
-    return sentiment
+    if _micro_batcher is not None:
+        return _micro_batcher.predict(review_text)
+    return predict_sentiments([review_text])[0]
 
-if __name__ == "__main__":
-    # 데이터 불러오기
-    train_data_path = 'data/ratings_train.txt'
-    with open(train_data_path, 'r', encoding='utf-8') as f:
-        data = f.readlines()
+# 학습 말뭉치 전처리: 프로세스 풀로 나눠 처리하고 내용 해시 기반 디스크 캐시에 저장
+TRAIN_DATA_PATH = 'data/ratings_train.txt'
+CORPUS_CACHE_DIR = 'data/cache'
+PREPROCESS_VERSION = 1  # 전처리 규칙이 바뀌면 올려서 캐시를 무효화
+CORPUS_CHUNK_SIZE = 2000
+
+
+def read_corpus(path):
+    """ID, text, label 형식의 말뭉치를 한 줄씩 읽어 (text, label)을 반환합니다."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for i, line in enumerate(f):
+            # 첫 줄이 헤더일 수 있으므로 건너뜁니다.
+            if i == 0 and 'label' in line:
+                continue
+            parts = line.strip().split('\t')
+            if len(parts) == 3:  # ID, text, label 형식일 경우
+                _, text, label = parts
+                yield text, int(label)
+
+
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def corpus_cache_path(path, cache_dir=CORPUS_CACHE_DIR):
+    """말뭉치 내용, 불용어, 전처리 버전으로 만든 해시를 캐시 파일 이름으로 사용합니다."""
+    digest = hashlib.sha256()
+    digest.update(f"v{PREPROCESS_VERSION}|{','.join(stopwords)}|".encode('utf-8'))
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{name}.{digest.hexdigest()[:16]}.tsv")
+
+
+def _init_corpus_worker():
+    # 워커마다 자체 Okt(JVM) 인스턴스를 가집니다.
+    get_okt()
+
+
+def _preprocess_chunk(chunk):
+    return [(' '.join(_analyze(normalize_text(text))), label) for text, label in chunk]
+
+
+def _preprocessed_corpus(path, workers):
+    chunks = _chunked(read_corpus(path), CORPUS_CHUNK_SIZE)
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _preprocess_chunk(chunk)
+        return
+    # JVM은 fork 이후 안전하지 않으므로 spawn으로 워커를 띄웁니다.
+    # 원문을 한꺼번에 읽어 들이지 않도록 워커 수에 비례한 묶음 단위로 작업을 넘깁니다.
+    ctx = multiprocessing.get_context('spawn')
+    with ctx.Pool(workers, initializer=_init_corpus_worker) as pool:
+        for window in _chunked(chunks, workers * 2):
+            for processed in pool.map(_preprocess_chunk, window):
+                yield from processed
 
+
+def build_corpus_cache(path=TRAIN_DATA_PATH, workers=None, cache_dir=CORPUS_CACHE_DIR):
+    """
+    말뭉치를 전처리해 'label<TAB>tokens' 형식의 캐시 파일을 만들고 경로를 반환합니다.
+    내용이 같은 캐시가 이미 있으면 전처리를 건너뜁니다.
+    """
+    cache_path = corpus_cache_path(path, cache_dir)
+    if os.path.exists(cache_path):
+        print(f"전처리 캐시 사용: {cache_path}")
+        return cache_path
+
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = cache_path + '.tmp'
+    start = time.perf_counter()
+    count = 0
+    with open(tmp_path, 'w', encoding='utf-8') as out:
+        for text, label in _preprocessed_corpus(path, workers):
+            out.write(f"{label}\t{text}\n")
+            count += 1
+    os.replace(tmp_path, cache_path)
+    print(f"전처리 완료: {count}건, 워커 {workers}개, {time.perf_counter() - start:.1f}s -> {cache_path}")
+    return cache_path
+
+
+def read_corpus_cache(cache_path):
+    """전처리 캐시 파일에서 (tokens, label)을 한 줄씩 읽습니다."""
+    with open(cache_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            label, _, text = line.rstrip('\n').partition('\t')
+            yield text, int(label)
+
+
+def load_preprocessed_corpus(path=TRAIN_DATA_PATH, workers=None):
+    """전처리된 텍스트 목록과 레이블 목록을 반환합니다."""
     texts, labels = [], []
-    for i, line in enumerate(data):
-        # 첫 줄이 헤더일 수 있으므로 건너뜁니다.
-        if i == 0 and 'label' in line:
-            continue
-        parts = line.strip().split('\t')
-        if len(parts) == 3:  # ID, text, label 형식일 경우
-            _, text, label = parts
-            texts.append(preprocess_text(text))
-            labels.append(int(label))
-
-    # 텍스트 토크나이저 및 패딩
+    for text, label in read_corpus_cache(build_corpus_cache(path, workers)):
+        texts.append(text)
+        labels.append(label)
+    return texts, labels
+
+
+# 스트리밍 학습 파이프라인: 말뭉치 크기와 상관없이 배치 크기만큼만 메모리에 올립니다.
+VALIDATION_EVERY = 5  # 5줄마다 1줄을 검증 데이터로 사용 (validation_split=0.2와 같은 비율)
+
+
+def pad_sequence(sequence, maxlen=MAX_LEN):
+    """Keras pad_sequences의 기본 동작(앞쪽 패딩/앞쪽 자르기)과 같은 단일 시퀀스 패딩."""
+    padded = np.zeros(maxlen, dtype=np.int32)
+    sequence = sequence[-maxlen:]
+    if len(sequence):
+        padded[-len(sequence):] = sequence
+    return padded
+
+
+def fit_tokenizer_streaming(cache_path):
+    """캐시 파일을 한 줄씩 읽으면서 토크나이저를 학습합니다."""
+    from tensorflow.keras.preprocessing.text import Tokenizer
+
     tokenizer = Tokenizer()
-    tokenizer.fit_on_texts(texts)
-    sequences = tokenizer.texts_to_sequences(texts)
-    padded_sequences = pad_sequences(sequences, maxlen=100)
+    tokenizer.fit_on_texts(text for text, _ in read_corpus_cache(cache_path))
+    return tokenizer
+
+
+def _example_generator(cache_path, tokenizer, validation):
+    def generate():
+        for i, (text, label) in enumerate(read_corpus_cache(cache_path)):
+            if (i % VALIDATION_EVERY == 0) != validation:
+                continue
+            sequence = tokenizer.texts_to_sequences([text])[0]
+            yield pad_sequence(sequence), np.float32(label)
+    return generate
+
 
-    # 모델 학습을 위한 설정
-    embedding_dim = 100
-    max_words = len(tokenizer.word_index) + 1
+def make_streaming_datasets(cache_path, tokenizer, batch_size=64, shuffle_buffer=10000):
+    """학습/검증용 tf.data 파이프라인을 만듭니다. (셔플 버퍼, 배치, prefetch 적용)"""
+    import tensorflow as tf
+
+    signature = (
+        tf.TensorSpec(shape=(MAX_LEN,), dtype=tf.int32),
+        tf.TensorSpec(shape=(), dtype=tf.float32),
+    )
+    train_ds = tf.data.Dataset.from_generator(
+        _example_generator(cache_path, tokenizer, validation=False), output_signature=signature
+    )
+    val_ds = tf.data.Dataset.from_generator(
+        _example_generator(cache_path, tokenizer, validation=True), output_signature=signature
+    )
+    train_ds = train_ds.shuffle(shuffle_buffer).batch(batch_size).prefetch(tf.data.AUTOTUNE)
+    val_ds = val_ds.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+    return train_ds, val_ds
+
+
+def build_model(max_words, embedding_dim=100):
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Embedding, LSTM, Dense
 
     model = Sequential()
-    model.add(Embedding(input_dim=max_words, output_dim=embedding_dim, input_length=100))
+    model.add(Embedding(input_dim=max_words, output_dim=embedding_dim, input_length=MAX_LEN))
     model.add(LSTM(128))
     model.add(Dense(1, activation='sigmoid'))
-
     model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy'])
-    model.summary()
+    return model
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LSTM 감정 분석 모델 학습")
+    parser.add_argument('--data', default=TRAIN_DATA_PATH, help="학습 말뭉치 경로")
+    parser.add_argument('--workers', type=int, default=None, help="전처리 프로세스 수 (기본: CPU 수)")
+    parser.add_argument('--stream', action='store_true', help="말뭉치를 메모리에 올리지 않고 스트리밍으로 학습")
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--shuffle-buffer', type=int, default=10000, help="스트리밍 모드 셔플 버퍼 크기")
+    args = parser.parse_args()
+
+    from tensorflow.keras.preprocessing.text import Tokenizer
+    from tensorflow.keras.preprocessing.sequence import pad_sequences
 
-    # 데이터 학습
-    labels = np.array(labels)
-    model.fit(padded_sequences, labels, epochs=5, batch_size=64, validation_split=0.2)
+    if args.stream:
+        # 전처리 결과는 디스크 캐시로만 흘려보내고, 학습은 캐시 파일을 스트리밍으로 읽습니다.
+        cache_path = build_corpus_cache(args.data, args.workers)
+        tokenizer = fit_tokenizer_streaming(cache_path)
+        train_ds, val_ds = make_streaming_datasets(cache_path, tokenizer, args.batch_size, args.shuffle_buffer)
 
-    # 모델 및 토크나이저 저장
-    model.save('models/lstm_model.h5')
-    with open('models/tokenizer.pickle', 'wb') as handle:
+        model = build_model(len(tokenizer.word_index) + 1)
+        model.summary()
+        model.fit(train_ds, validation_data=val_ds, epochs=args.epochs)
+    else:
+        # 데이터 불러오기 및 전처리 (캐시가 있으면 재사용)
+        texts, labels = load_preprocessed_corpus(args.data, args.workers)
+
+        # 텍스트 토크나이저 및 패딩
+        tokenizer = Tokenizer()
+        tokenizer.fit_on_texts(texts)
+        sequences = tokenizer.texts_to_sequences(texts)
+        padded_sequences = pad_sequences(sequences, maxlen=MAX_LEN)
+
+        # 모델 학습을 위한 설정
+        model = build_model(len(tokenizer.word_index) + 1)
+        model.summary()
+
+        # 데이터 학습
+        labels = np.array(labels)
+        model.fit(padded_sequences, labels, epochs=args.epochs, batch_size=args.batch_size, validation_split=0.2)
+
+    # 실행 중인 앱이 파일 변경을 감지해 다시 로드하므로 모든 파일을 임시 파일에 쓴 뒤 교체합니다.
+    # .h5를 마지막에 교체해, 그 사이에 .h5만 새것이 되어 auto 모드가 Keras 엔진으로 바뀌는 일이 없게 합니다.
+    # (os.replace는 수정 시각을 유지하므로 교체 후에도 .npz가 .h5보다 새것입니다.)
+    from numpy_lstm import export_weights
+    from vocab_index import write_vocab
+
+    tmp_model_path = MODEL_PATH + '.tmp.h5'
+    model.save(tmp_model_path)
+
+    # 추론용 어휘 파일과 토크나이저
+    write_vocab(tokenizer.word_index, VOCAB_PATH, tokenizer.num_words, tokenizer.oov_token)
+    with open(TOKENIZER_PATH + '.tmp', 'wb') as handle:
         pickle.dump(tokenizer, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(TOKENIZER_PATH + '.tmp', TOKENIZER_PATH)
+
+    # NumPy 추론용 가중치도 항상 다시 내보내 .h5와 .npz가 같은 학습 결과를 담도록 합니다.
+    export_weights(tmp_model_path, NUMPY_MODEL_PATH)
+    os.replace(tmp_model_path, MODEL_PATH)
 
     print("모델 및 토크나이저 저장 완료")
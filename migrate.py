@@ -0,0 +1,354 @@
+import argparse
+import sys
+
+import pymysql
+
+# 버전별 스키마 마이그레이션과 쿼리 실행 계획 검사 도구
+# - 적용한 버전은 schema_version 테이블에 기록하고, 아직 적용하지 않은 마이그레이션만 순서대로 실행합니다.
+# - MySQL의 DDL은 바로 커밋되므로 각 마이그레이션은 여러 번 실행해도 같은 결과가 되도록 작성합니다.
+# - verify는 checkdb.py와 app.py의 쿼리를 EXPLAIN하여 전체 스캔(type=ALL)이 있으면 실패합니다.
+#
+# 사용 예:
+#   python migrate.py status
+#   python migrate.py upgrade
+#   python migrate.py verify
+
+
+def _existing_indexes(cur, table):
+    """{인덱스 이름: (유니크 여부, 컬럼 목록)}을 반환합니다."""
+    cur.execute("""
+        SELECT INDEX_NAME, NON_UNIQUE, COLUMN_NAME
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY INDEX_NAME, SEQ_IN_INDEX
+    """, (table,))
+    indexes = {}
+    for row in cur.fetchall():
+        unique, columns = indexes.get(row['INDEX_NAME'], (not row['NON_UNIQUE'], []))
+        columns.append(row['COLUMN_NAME'])
+        indexes[row['INDEX_NAME']] = (unique, columns)
+    return indexes
+
+
+def _add_index(cur, table, name, columns, unique=False):
+    """같은 컬럼으로 시작하는 인덱스가 없을 때만 인덱스를 추가합니다."""
+    for existing_unique, existing_columns in _existing_indexes(cur, table).values():
+        if existing_columns[:len(columns)] == list(columns) and (existing_unique or not unique):
+            if not unique or len(existing_columns) == len(columns):
+                return False
+    kind = 'UNIQUE INDEX' if unique else 'INDEX'
+    cur.execute(f"ALTER TABLE {table} ADD {kind} {name} ({', '.join(columns)})")
+    print(f"{table}에 {name}({', '.join(columns)}) 인덱스를 추가했습니다.")
+    return True
+
+
+def _column_exists(cur, table, column):
+    cur.execute("""
+        SELECT 1 FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return cur.fetchone() is not None
+
+
+def _add_column(cur, table, column, definition):
+    """컬럼이 없을 때만 추가합니다."""
+    if _column_exists(cur, table, column):
+        return False
+    cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    print(f"{table}.{column} 컬럼을 추가했습니다.")
+    return True
+
+
+def _create_tables(cur):
+    # 앱이 처음부터 사용하던 테이블 (기존 DB에서는 이미 있으므로 건너뜀)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS USER (
+            user_id VARCHAR(50) PRIMARY KEY,
+            password VARCHAR(255) NOT NULL,
+            username VARCHAR(100) NOT NULL
+        ) CHARACTER SET utf8mb4
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS MOVIE (
+            movie_id INT AUTO_INCREMENT PRIMARY KEY,
+            movie_name VARCHAR(255) NOT NULL,
+            tmdb_id INT NOT NULL,
+            original_title VARCHAR(255),
+            release_date DATE NULL,
+            runtime INT,
+            overview TEXT,
+            director VARCHAR(255),
+            cast TEXT,
+            production_company TEXT
+        ) CHARACTER SET utf8mb4
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS movie_list (
+            movie_id INT AUTO_INCREMENT PRIMARY KEY,
+            movie_name VARCHAR(255) NOT NULL,
+            genre_id INT NULL,
+            tmdb_id INT NOT NULL UNIQUE,
+            original_title VARCHAR(255),
+            release_date DATE NULL,
+            runtime INT,
+            overview TEXT,
+            director VARCHAR(255),
+            cast TEXT,
+            production_company TEXT
+        ) CHARACTER SET utf8mb4
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS movie_genre (
+            movie_id INT NOT NULL,
+            genre_id INT NOT NULL,
+            PRIMARY KEY (movie_id, genre_id)
+        ) CHARACTER SET utf8mb4
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS REVIEW (
+            user_id VARCHAR(50) NOT NULL,
+            movie_id INT NOT NULL,
+            review_text TEXT NOT NULL,
+            sentiment VARCHAR(10) NOT NULL,
+            PRIMARY KEY (user_id, movie_id)
+        ) CHARACTER SET utf8mb4
+    """)
+
+
+def _add_lookup_indexes(cur):
+    # upsert_movie_with_genres / bulk_upsert_movies의 ON DUPLICATE KEY와 tmdb_id 조회
+    try:
+        _add_index(cur, 'MOVIE', 'uq_movie_tmdb_id', ['tmdb_id'], unique=True)
+    except pymysql.IntegrityError:
+        print("MOVIE.tmdb_id에 중복 행이 있습니다. 중복을 정리한 뒤 다시 실행해주세요:\n"
+              "  SELECT tmdb_id, COUNT(*) FROM MOVIE GROUP BY tmdb_id HAVING COUNT(*) > 1;")
+        raise
+    # check_review_exists, get_review_sentiment, 마이페이지 (PK가 없던 DB를 위한 보완)
+    _add_index(cur, 'REVIEW', 'idx_review_user_movie', ['user_id', 'movie_id'], unique=True)
+    # 검색 화면의 다른 사용자 리뷰 목록
+    _add_index(cur, 'REVIEW', 'idx_review_movie', ['movie_id'])
+    # 장르 → 영화 역방향 조회
+    _add_index(cur, 'movie_genre', 'idx_movie_genre_genre', ['genre_id', 'movie_id'])
+
+
+def _async_sentiment_columns(cur):
+    # 비동기 감정 분석의 'pending' 값과 재분석 모델 버전 (rescore_reviews.py)
+    cur.execute("ALTER TABLE REVIEW MODIFY COLUMN sentiment VARCHAR(10) NOT NULL")
+    _add_column(cur, 'REVIEW', 'model_version', 'VARCHAR(32) NULL')
+    # fetch_pending_reviews의 WHERE sentiment = 'pending'
+    _add_index(cur, 'REVIEW', 'idx_review_sentiment', ['sentiment'])
+
+
+def _movie_stats(cur):
+    # 리뷰 작성 시각 (기존 리뷰는 마이그레이션 시각으로 채워짐)과 검색 화면 최신 리뷰 목록용 인덱스
+    _add_column(cur, 'REVIEW', 'created_at', 'TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP')
+    _add_index(cur, 'REVIEW', 'idx_review_movie_created', ['movie_id', 'created_at'])
+    # 영화별 리뷰 집계 (movie_stats.py)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS movie_stats (
+            movie_id INT PRIMARY KEY,
+            review_count INT NOT NULL DEFAULT 0,
+            positive_count INT NOT NULL DEFAULT 0,
+            last_review_at TIMESTAMP NULL,
+            KEY idx_movie_stats_popularity (positive_count, review_count)
+        ) CHARACTER SET utf8mb4
+    """)
+    cur.execute("DELETE FROM movie_stats")
+    cur.execute("""
+        INSERT INTO movie_stats (movie_id, review_count, positive_count, last_review_at)
+        SELECT movie_id, COUNT(*), SUM(sentiment = 'positive'), MAX(created_at)
+        FROM REVIEW
+        GROUP BY movie_id
+    """)
+
+
+def _overview_tokens(cur):
+    # overview의 Okt 토큰 (NULL이면 아직 계산 전, 빈 문자열이면 토큰 없음). content_index.py backfill로 채웁니다.
+    _add_column(cur, 'MOVIE', 'overview_tokens', 'TEXT NULL')
+
+
+# (버전, 설명, 적용 함수). 새 마이그레이션은 항상 끝에 추가합니다.
+MIGRATIONS = [
+    (1, "기본 테이블 생성", _create_tables),
+    (2, "tmdb_id, REVIEW, movie_genre 조회 인덱스", _add_lookup_indexes),
+    (3, "REVIEW pending 감정값과 model_version 컬럼", _async_sentiment_columns),
+    (4, "REVIEW.created_at과 movie_stats 집계 테이블", _movie_stats),
+    (5, "MOVIE.overview_tokens 컬럼", _overview_tokens),
+]
+
+
+def _ensure_version_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ) CHARACTER SET utf8mb4
+    """)
+
+
+def applied_versions(conn):
+    """적용된 마이그레이션 버전 집합을 반환합니다."""
+    with conn.cursor() as cur:
+        _ensure_version_table(cur)
+        cur.execute("SELECT version FROM schema_version")
+        return {row['version'] for row in cur.fetchall()}
+
+
+def current_version(conn):
+    return max(applied_versions(conn), default=0)
+
+
+def upgrade(conn, target=None):
+    """아직 적용하지 않은 마이그레이션을 target 버전까지 순서대로 적용하고, 적용한 버전 목록을 반환합니다."""
+    applied = applied_versions(conn)
+    done = []
+    for version, description, migration in MIGRATIONS:
+        if version in applied or (target is not None and version > target):
+            continue
+        print(f"마이그레이션 {version}: {description}")
+        with conn.cursor() as cur:
+            migration(cur)
+            cur.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)", (version, description))
+        conn.commit()
+        done.append(version)
+    return done
+
+
+# verify에서 검사할 쿼리: (이름, SQL, 예시 파라미터, 전체 읽기 허용 여부)
+# checkdb.py와 app.py의 쿼리를 바꾸면 여기도 함께 바꿔야 합니다. (쓰기 쿼리는 verify_queries()에서 모듈 상수를 그대로 가져옴)
+# 카탈로그/역색인 적재처럼 테이블 전체를 읽는 것이 목적인 쿼리만 전체 읽기를 허용합니다.
+QUERIES = [
+    ("checkdb.bulk_upsert_movies: tmdb_id → movie_id",
+     "SELECT movie_id, tmdb_id FROM MOVIE WHERE tmdb_id IN (%s, %s, %s)", (1, 2, 3), False),
+    ("checkdb.fetch_pending_reviews",
+     "SELECT user_id, movie_id, review_text FROM REVIEW WHERE sentiment = 'pending' LIMIT %s", (1000,), False),
+    ("checkdb.get_review_sentiment",
+     "SELECT sentiment FROM REVIEW WHERE user_id = %s AND movie_id = %s", ('user', 1), False),
+    ("checkdb.recommend_movies_for_user",
+     "SELECT movie_id, sentiment FROM REVIEW WHERE user_id = %s", ('user',), False),
+    ("checkdb.verify_user",
+     "SELECT user_id, password FROM USER WHERE user_id = %s", ('user',), False),
+    ("checkdb.check_review_exists",
+     "SELECT 1 FROM REVIEW WHERE user_id = %s AND movie_id = %s", ('user', 1), False),
+    ("checkdb._fetch_movies_for_index",
+     "SELECT movie_id, movie_name, overview_tokens, tmdb_id FROM MOVIE WHERE movie_id IN (%s, %s, %s)",
+     (1, 2, 3), False),
+    ("checkdb.recommend_movies_based_on_genre_and_overview: 선택 영화 장르",
+     "SELECT genre_id FROM movie_genre WHERE movie_id = %s", (1,), False),
+    ("movie_sampler._fetch_movies",
+     "SELECT movie_id, movie_name, tmdb_id FROM movie_list WHERE movie_id IN (%s, %s, %s)", (1, 2, 3), False),
+    ("app.display_user_reviews",
+     """SELECT m.movie_name, r.review_text, r.sentiment, m.tmdb_id
+        FROM REVIEW r JOIN MOVIE m ON r.movie_id = m.movie_id
+        WHERE r.user_id = %s""", ('user',), False),
+    ("app.display_recommendations",
+     "SELECT movie_name FROM MOVIE WHERE movie_id = %s", (1,), False),
+    ("app 검색: 다른 사용자 리뷰",
+     """SELECT r.review_text, r.sentiment, u.username
+        FROM REVIEW r JOIN USER u ON r.user_id = u.user_id
+        WHERE r.movie_id = %s
+        ORDER BY r.created_at DESC
+        LIMIT %s""", (1, 20), False),
+    ("movie_stats.get_stats",
+     "SELECT movie_id, review_count, positive_count, last_review_at FROM movie_stats WHERE movie_id IN (%s, %s, %s)",
+     (1, 2, 3), False),
+    ("movie_stats.popular_movies",
+     """SELECT s.movie_id, m.movie_name, m.tmdb_id, s.review_count, s.positive_count
+        FROM movie_stats s JOIN MOVIE m ON m.movie_id = s.movie_id
+        WHERE s.positive_count > 0
+        ORDER BY s.positive_count DESC, s.review_count DESC
+        LIMIT %s""", (50,), False),
+    ("content_index.get_genre_index (역색인 적재)",
+     "SELECT movie_id, genre_id FROM movie_genre", (), True),
+    ("movie_sampler._movie_ids (id 목록 적재)",
+     "SELECT movie_id FROM movie_list", (), True),
+]
+
+
+def verify_queries():
+    """QUERIES에 코드가 실제로 실행하는 쓰기/잠금 쿼리(모듈 상수)를 더한 검사 목록을 반환합니다."""
+    import checkdb
+    import content_index
+    import movie_stats
+
+    # INSERT는 읽는 행이 없어도 EXPLAIN에서 type=ALL로 표시되므로 전체 읽기를 허용합니다. (중복 검사는 UNIQUE/PK로 함)
+    return QUERIES + [
+        ("checkdb.save_review",
+         checkdb.INSERT_REVIEW_SQL, ('user', 1, '리뷰', 'pending'), True),
+        ("movie_stats.record_review",
+         movie_stats.RECORD_REVIEW_SQL, (1, 1), True),
+        ("checkdb.update_review_sentiments: pending 행 잠금",
+         checkdb.LOCK_PENDING_REVIEWS_SQL.format(rows='(%s, %s), (%s, %s)'), ('user', 1, 'user', 2), False),
+        ("checkdb.update_review_sentiments: 감정 갱신",
+         checkdb.UPDATE_REVIEW_SENTIMENT_SQL, ('positive', 'user', 1), False),
+        ("movie_stats.add_positive_counts",
+         movie_stats.ADD_POSITIVE_COUNTS_SQL.format(cases='WHEN %s THEN %s WHEN %s THEN %s', placeholders='%s, %s'),
+         (1, 1, 2, 1, 1, 2), False),
+        ("content_index.backfill_overview_tokens",
+         content_index.UPDATE_OVERVIEW_TOKENS_SQL, ('토큰', 1), False),
+        ("checkdb.create_user: 아이디 중복 확인",
+         checkdb.USER_EXISTS_SQL, ('user',), False),
+        ("content_index.fetch_catalog (TF-IDF 적재)",
+         content_index.FETCH_CATALOG_SQL, (), True),
+    ]
+
+
+def verify(conn):
+    """
+    verify_queries()를 EXPLAIN하여 전체 스캔(type=ALL)이 있는 쿼리 이름 목록을 반환합니다.
+    행이 거의 없는 테이블에서는 옵티마이저가 인덱스 대신 스캔을 고를 수 있으므로 실제와 비슷한 데이터에서 실행해야 합니다.
+    """
+    failures = []
+    with conn.cursor() as cur:
+        for name, sql, params, allow_full_scan in verify_queries():
+            cur.execute("EXPLAIN " + sql, params)
+            plan = cur.fetchall()
+            scans = [row for row in plan if row.get('type') == 'ALL']
+            status = 'OK'
+            if scans and allow_full_scan:
+                status = '전체 읽기(의도됨)'
+            elif scans:
+                status = 'FULL SCAN'
+                failures.append(name)
+            print(f"[{status}] {name}")
+            for row in plan:
+                print(f"    table={row.get('table')} type={row.get('type')} key={row.get('key')} rows={row.get('rows')}")
+    return failures
+
+
+def _connect():
+    from checkdb import get_db_connection
+    conn = get_db_connection()
+    if not conn:
+        print("Database connection failed.")
+        sys.exit(1)
+    return conn
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DB 스키마 마이그레이션과 쿼리 실행 계획 검사")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('status', help="적용된 버전과 남은 마이그레이션 표시")
+    upgrade_parser = subparsers.add_parser('upgrade', help="남은 마이그레이션 적용")
+    upgrade_parser.add_argument('--target', type=int, help="이 버전까지만 적용")
+    subparsers.add_parser('verify', help="checkdb.py/app.py 쿼리를 EXPLAIN하여 전체 스캔이 있으면 실패")
+    args = parser.parse_args()
+
+    conn = _connect()
+    try:
+        if args.command == 'status':
+            applied = applied_versions(conn)
+            for version, description, _ in MIGRATIONS:
+                print(f"{'적용됨' if version in applied else '대기  '} {version}: {description}")
+        elif args.command == 'upgrade':
+            done = upgrade(conn, args.target)
+            print(f"{len(done)}개 마이그레이션을 적용했습니다. 현재 버전 {current_version(conn)}")
+        elif args.command == 'verify':
+            failures = verify(conn)
+            if failures:
+                print(f"전체 스캔 쿼리 {len(failures)}개: {', '.join(failures)}")
+                sys.exit(1)
+            print("모든 쿼리가 인덱스를 사용합니다.")
+    finally:
+        conn.close()
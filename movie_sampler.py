@@ -0,0 +1,78 @@
+import datetime
+import random
+import threading
+import time
+from array import array
+
+# ORDER BY RAND() 대신 movie_list의 movie_id 목록을 캐시해 두고 메모리에서 균등하게 뽑습니다.
+# movie_id 목록은 PK 인덱스만 읽으면 되고, ID_LIST_TTL마다 한 번만 다시 읽습니다.
+ID_LIST_TTL = 600.0
+
+_lock = threading.Lock()
+_ids = array('q')
+_ids_loaded_at = 0.0
+_todays = {'date': None, 'limit': None, 'movies': None}
+
+
+def _movie_ids(cur, refresh=False):
+    global _ids, _ids_loaded_at
+    if refresh or not _ids or time.monotonic() - _ids_loaded_at > ID_LIST_TTL:
+        with _lock:
+            if refresh or not _ids or time.monotonic() - _ids_loaded_at > ID_LIST_TTL:
+                cur.execute("SELECT movie_id FROM movie_list")
+                _ids = array('q', (row['movie_id'] for row in cur.fetchall()))
+                _ids_loaded_at = time.monotonic()
+    return _ids
+
+
+def _fetch_movies(cur, movie_ids):
+    placeholders = ', '.join(['%s'] * len(movie_ids))
+    cur.execute(f"""
+        SELECT movie_id, movie_name, tmdb_id
+        FROM movie_list
+        WHERE movie_id IN ({placeholders})
+    """, tuple(movie_ids))
+    by_id = {row['movie_id']: row for row in cur.fetchall()}
+    # 뽑힌 순서를 유지하고, 그 사이 삭제된 영화는 빠집니다.
+    return [by_id[movie_id] for movie_id in movie_ids if movie_id in by_id]
+
+
+def sample_movies(cur, limit=5, rng=random):
+    """movie_list에서 limit개의 영화를 균등하게 무작위로 뽑습니다. (PK 조회 한 번)"""
+    ids = _movie_ids(cur)
+    if not ids:
+        return []
+    movies = _fetch_movies(cur, rng.sample(ids, min(limit, len(ids))))
+    if len(movies) < min(limit, len(ids)):
+        # 캐시 이후 삭제된 영화가 있으면 목록을 새로 읽고 한 번 더 뽑습니다.
+        ids = _movie_ids(cur, refresh=True)
+        if ids:
+            movies = _fetch_movies(cur, rng.sample(ids, min(limit, len(ids))))
+    return movies
+
+
+def pick_movies(cur, limit, pool, rng=random):
+    """pool에서 limit개를 무작위로 뽑고, 모자라면 movie_list 전체에서 균등하게 뽑아 채웁니다."""
+    movies = rng.sample(pool, min(limit, len(pool)))
+    if len(movies) < limit:
+        picked = {movie['tmdb_id'] for movie in movies}
+        extra = sample_movies(cur, limit - len(movies) + len(picked), rng)
+        movies += [movie for movie in extra if movie['tmdb_id'] not in picked][:limit - len(movies)]
+    return movies
+
+
+def todays_picks(cur, limit=5, candidates=None):
+    """
+    오늘의 추천 영화를 반환합니다. 날짜를 시드로 하루에 한 번만 뽑고, 그날은 캐시된 결과를 돌려줍니다.
+    시드가 같으므로 여러 프로세스에서도 같은 목록이 나옵니다.
+    candidates(후보 목록을 반환하는 함수)를 주면 그 후보 중에서 먼저 뽑습니다. (캐시된 날에는 호출하지 않음)
+    """
+    today = datetime.date.today()
+    with _lock:
+        if _todays['date'] == today and _todays['limit'] == limit:
+            return list(_todays['movies'])
+    pool = candidates() if candidates is not None else []
+    movies = pick_movies(cur, limit, pool, rng=random.Random(today.toordinal()))
+    with _lock:
+        _todays.update(date=today, limit=limit, movies=movies)
+    return list(movies)
@@ -0,0 +1,109 @@
+import argparse
+import threading
+import time
+
+# 영화별 리뷰 집계(movie_stats): 리뷰 수, 긍정 리뷰 수, 마지막 리뷰 시각
+# save_review와 update_review_sentiments가 같은 트랜잭션 안에서 갱신하므로 REVIEW를 스캔하지 않고 인기순 조회를 할 수 있습니다.
+# 집계가 어긋났을 때(직접 수정, 재분석 등)는 rebuild로 REVIEW에서 다시 계산합니다.
+POPULAR_TTL = 300.0  # 인기 영화 목록을 다시 읽는 주기(초)
+
+# migrate.py verify가 같은 문자열을 EXPLAIN하도록 쿼리를 모듈 상수로 둡니다.
+RECORD_REVIEW_SQL = """
+    INSERT INTO movie_stats (movie_id, review_count, positive_count, last_review_at)
+    VALUES (%s, 1, %s, NOW())
+    ON DUPLICATE KEY UPDATE
+        review_count = review_count + 1,
+        positive_count = positive_count + VALUES(positive_count),
+        last_review_at = VALUES(last_review_at)
+"""
+# {cases}는 'WHEN %s THEN %s'를, {placeholders}는 '%s'를 영화 수만큼 이은 문자열
+ADD_POSITIVE_COUNTS_SQL = """
+    UPDATE movie_stats
+    SET positive_count = positive_count + CASE movie_id {cases} ELSE 0 END
+    WHERE movie_id IN ({placeholders})
+"""
+
+_lock = threading.Lock()
+_popular = {'limit': 0, 'movies': [], 'loaded_at': None}
+
+
+def record_review(cur, movie_id, sentiment):
+    """새 리뷰 1건을 집계에 반영합니다. 호출한 쪽의 트랜잭션 안에서 실행됩니다."""
+    cur.execute(RECORD_REVIEW_SQL, (movie_id, 1 if sentiment == 'positive' else 0))
+
+
+def add_positive_counts(cur, positive_by_movie):
+    """{movie_id: 새로 긍정이 된 리뷰 수}만큼 positive_count를 늘립니다. (pending 리뷰 분석 완료 시, UPDATE 한 번)"""
+    if positive_by_movie:
+        cases = ' '.join(['WHEN %s THEN %s'] * len(positive_by_movie))
+        placeholders = ', '.join(['%s'] * len(positive_by_movie))
+        cur.execute(ADD_POSITIVE_COUNTS_SQL.format(cases=cases, placeholders=placeholders),
+                    (*[value for item in positive_by_movie.items() for value in item], *positive_by_movie))
+
+
+def rebuild(cur):
+    """REVIEW 전체에서 집계를 다시 계산합니다. 호출한 쪽에서 커밋합니다."""
+    cur.execute("DELETE FROM movie_stats")
+    cur.execute("""
+        INSERT INTO movie_stats (movie_id, review_count, positive_count, last_review_at)
+        SELECT movie_id, COUNT(*), SUM(sentiment = 'positive'), MAX(created_at)
+        FROM REVIEW
+        GROUP BY movie_id
+    """)
+    with _lock:
+        _popular['loaded_at'] = None
+    return cur.rowcount
+
+
+def get_stats(cur, movie_ids):
+    """{movie_id: {'review_count', 'positive_count', 'last_review_at'}}를 반환합니다. 리뷰가 없는 영화는 빠집니다."""
+    if not movie_ids:
+        return {}
+    placeholders = ', '.join(['%s'] * len(movie_ids))
+    cur.execute(f"""
+        SELECT movie_id, review_count, positive_count, last_review_at
+        FROM movie_stats
+        WHERE movie_id IN ({placeholders})
+    """, tuple(movie_ids))
+    return {row['movie_id']: row for row in cur.fetchall()}
+
+
+def popular_movies(cur, limit=50):
+    """
+    긍정 리뷰 수(같으면 리뷰 수) 순으로 상위 limit개 영화를 반환합니다.
+    movie_stats의 인기순 인덱스만 읽고, 결과는 POPULAR_TTL 동안 캐시합니다.
+    """
+    now = time.monotonic()
+    with _lock:
+        if (_popular['loaded_at'] is not None and now - _popular['loaded_at'] < POPULAR_TTL
+                and _popular['limit'] >= limit):
+            return _popular['movies'][:limit]
+    cur.execute("""
+        SELECT s.movie_id, m.movie_name, m.tmdb_id, s.review_count, s.positive_count
+        FROM movie_stats s
+        JOIN MOVIE m ON m.movie_id = s.movie_id
+        WHERE s.positive_count > 0
+        ORDER BY s.positive_count DESC, s.review_count DESC
+        LIMIT %s
+    """, (limit,))
+    movies = cur.fetchall()
+    with _lock:
+        _popular.update(limit=limit, movies=movies, loaded_at=time.monotonic())
+    return movies[:limit]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="영화별 리뷰 집계(movie_stats) 관리")
+    parser.add_argument('command', choices=['rebuild'])
+    args = parser.parse_args()
+
+    from checkdb import get_db_connection
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            rows = rebuild(cur)
+        conn.commit()
+        print(f"movie_stats 재계산 완료: {rows}편")
+    finally:
+        conn.close()
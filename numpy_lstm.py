@@ -0,0 +1,138 @@
+import argparse
+import os
+import numpy as np
+
+# Embedding -> LSTM(128) -> Dense(1) 구조의 감정 분석 모델을 TensorFlow 없이 추론합니다.
+KERAS_MODEL_PATH = 'models/lstm_model.h5'
+NUMPY_MODEL_PATH = 'models/lstm_model.npz'
+
+
+def export_weights(h5_path=KERAS_MODEL_PATH, npz_path=NUMPY_MODEL_PATH):
+    """
+    Keras 모델(.h5)에서 가중치를 꺼내 압축된 .npz 파일로 저장합니다.
+    실행 중인 앱이 다시 로드하다 덜 쓰인 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체합니다.
+    """
+    from tensorflow.keras.models import load_model
+
+    model = load_model(h5_path)
+    embedding_layer, lstm_layer, dense_layer = model.layers
+    embedding, = embedding_layer.get_weights()
+    kernel, recurrent_kernel, bias = lstm_layer.get_weights()
+    dense_kernel, dense_bias = dense_layer.get_weights()
+    tmp_path = npz_path + '.tmp.npz'  # savez는 확장자가 .npz가 아니면 덧붙이므로 .npz로 끝나게 함
+    np.savez_compressed(
+        tmp_path,
+        embedding=embedding.astype(np.float32),
+        kernel=kernel.astype(np.float32),
+        recurrent_kernel=recurrent_kernel.astype(np.float32),
+        bias=bias.astype(np.float32),
+        dense_kernel=dense_kernel.astype(np.float32),
+        dense_bias=dense_bias.astype(np.float32),
+    )
+    os.replace(tmp_path, npz_path)
+    print(f"가중치 저장 완료: {npz_path}")
+    return npz_path
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class NumpyLSTM:
+    """
+    Keras LSTM(게이트 순서 i, f, c, o / tanh, sigmoid 활성화)과 같은 계산을 NumPy로 수행합니다.
+    """
+
+    def __init__(self, npz_path=NUMPY_MODEL_PATH):
+        with np.load(npz_path) as weights:
+            self.embedding = weights['embedding']
+            self.kernel = weights['kernel']
+            self.recurrent_kernel = weights['recurrent_kernel']
+            self.bias = weights['bias']
+            self.dense_kernel = weights['dense_kernel']
+            self.dense_bias = weights['dense_bias']
+        self.units = self.recurrent_kernel.shape[0]
+        self._pad_states = None
+
+    def _step(self, x_proj, h, c):
+        z = x_proj + h @ self.recurrent_kernel
+        u = self.units
+        i = _sigmoid(z[:, :u])
+        f = _sigmoid(z[:, u:2 * u])
+        g = np.tanh(z[:, 2 * u:3 * u])
+        o = _sigmoid(z[:, 3 * u:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+        return h, c
+
+    def _padding_states(self, maxlen):
+        # 패딩 토큰(0)만 n개 입력했을 때의 상태는 모든 리뷰가 같으므로 한 번만 계산해 둡니다.
+        if self._pad_states is None or len(self._pad_states[0]) <= maxlen:
+            pad_proj = (self.embedding[0] @ self.kernel + self.bias)[None, :]
+            h = np.zeros((1, self.units), dtype=np.float32)
+            c = np.zeros((1, self.units), dtype=np.float32)
+            hs, cs = [h[0]], [c[0]]
+            for _ in range(maxlen):
+                h, c = self._step(pad_proj, h, c)
+                hs.append(h[0])
+                cs.append(c[0])
+            self._pad_states = (np.stack(hs), np.stack(cs))
+        return self._pad_states
+
+    def predict(self, padded):
+        """앞쪽 패딩된 (batch, maxlen) 정수 배열에 대해 긍정 확률을 반환합니다."""
+        padded = np.asarray(padded, dtype=np.int64)
+        batch, maxlen = padded.shape
+        if batch == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        # 모든 행의 앞쪽 패딩 구간은 미리 계산한 상태로 건너뜁니다.
+        nonzero = padded != 0
+        pad_lengths = np.where(nonzero.any(axis=1), np.argmax(nonzero, axis=1), maxlen)
+        start = int(pad_lengths.min())
+        pad_h, pad_c = self._padding_states(maxlen)
+        h = np.tile(pad_h[start], (batch, 1))
+        c = np.tile(pad_c[start], (batch, 1))
+
+        # 나머지 구간의 입력 투영은 한 번의 행렬곱으로 계산합니다.
+        x_proj = self.embedding[padded[:, start:]] @ self.kernel + self.bias
+        for t in range(maxlen - start):
+            h, c = self._step(x_proj[:, t], h, c)
+        return _sigmoid(h @ self.dense_kernel + self.dense_bias)[:, 0]
+
+
+def check_parity(texts, h5_path=KERAS_MODEL_PATH, npz_path=NUMPY_MODEL_PATH, atol=1e-4):
+    """Keras 모델과 NumPy 엔진의 출력 차이를 비교합니다. 최대 오차를 반환합니다."""
+    from tensorflow.keras.models import load_model
+    from lstm_model import get_model_and_tokenizer, preprocess_text, pad_sequence
+
+    _, tokenizer = get_model_and_tokenizer()
+    sequences = tokenizer.texts_to_sequences([preprocess_text(text) for text in texts])
+    padded = np.stack([pad_sequence(sequence) for sequence in sequences])
+
+    keras_scores = load_model(h5_path).predict(padded, verbose=0)[:, 0]
+    numpy_scores = NumpyLSTM(npz_path).predict(padded)
+    max_diff = float(np.max(np.abs(keras_scores - numpy_scores)))
+    status = "일치" if max_diff <= atol else "불일치"
+    print(f"Keras/NumPy 출력 비교: 최대 오차 {max_diff:.2e} ({status}, 허용 {atol:.0e})")
+    return max_diff
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LSTM 감정 분석 모델의 NumPy 추론 엔진")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('export', help="Keras 모델 가중치를 .npz로 저장")
+    check_parser = subparsers.add_parser('check', help="Keras 출력과 NumPy 출력 비교")
+    check_parser.add_argument('--data', default='data/ratings_train.txt', help="비교에 사용할 말뭉치")
+    check_parser.add_argument('--samples', type=int, default=200)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export_weights()
+    else:
+        from itertools import islice
+        from lstm_model import read_corpus
+
+        sample_texts = [text for text, _ in islice(read_corpus(args.data), args.samples)]
+        if check_parity(sample_texts) > 1e-4:
+            raise SystemExit(1)
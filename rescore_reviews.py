@@ -0,0 +1,130 @@
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import pymysql
+
+from checkdb import get_db_connection
+from lstm_model import get_model_version
+import movie_stats
+
+# 재학습한 모델로 기존 REVIEW 전체의 감정을 다시 분석하는 도구
+# - 서버 측 커서(SSDictCursor)로 한 묶음씩 읽으므로 테이블 크기와 상관없이 메모리가 일정합니다.
+# - 묶음은 프로세스 풀에서 배치 추론하고, 결과는 executemany로 한 번에 갱신합니다.
+# - 행마다 model_version을 기록하고 아직 현재 버전이 아닌 행만 읽으므로, 중단 후 다시 실행하면 이어서 처리됩니다.
+
+
+def ensure_model_version_column():
+    """REVIEW.model_version 컬럼이 없으면 추가합니다."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT 1 FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'REVIEW' AND COLUMN_NAME = 'model_version'
+            """)
+            if cur.fetchone() is None:
+                cur.execute("ALTER TABLE REVIEW ADD COLUMN model_version VARCHAR(32) NULL")
+                print("REVIEW.model_version 컬럼을 추가했습니다.")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _init_worker():
+    # 워커마다 모델과 Okt를 미리 로드해 둡니다.
+    from lstm_model import warm_up
+    warm_up(load_sentiment_model=True)
+
+
+def _score_chunk(chunk):
+    from lstm_model import predict_sentiments
+    sentiments = predict_sentiments([row['review_text'] for row in chunk])
+    return [(sentiment, row['user_id'], row['movie_id']) for row, sentiment in zip(chunk, sentiments)]
+
+
+def _write_results(results, model_version):
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.executemany("""
+                UPDATE REVIEW SET sentiment = %s, model_version = %s
+                WHERE user_id = %s AND movie_id = %s
+            """, [(sentiment, model_version, user_id, movie_id) for sentiment, user_id, movie_id in results])
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _stream_chunks(model_version, chunk_size):
+    conn = get_db_connection()
+    try:
+        with conn.cursor(pymysql.cursors.SSDictCursor) as cur:
+            cur.execute("""
+                SELECT user_id, movie_id, review_text
+                FROM REVIEW
+                WHERE (model_version IS NULL OR model_version != %s) AND sentiment != 'pending'
+            """, (model_version,))
+            while True:
+                chunk = cur.fetchmany(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        conn.close()
+
+
+def rescore(workers, chunk_size):
+    model_version = get_model_version()
+    print(f"모델 버전 {model_version}으로 리뷰 재분석을 시작합니다. (워커 {workers}개, 묶음 {chunk_size}건)")
+
+    scored = 0
+    started = time.perf_counter()
+    # JVM(Okt)은 fork 이후 안전하지 않으므로 spawn으로 워커를 띄웁니다.
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker) as executor:
+        in_flight = set()
+
+        def drain(return_when):
+            nonlocal scored, in_flight
+            done, in_flight = wait(in_flight, return_when=return_when)
+            for future in done:
+                results = future.result()
+                _write_results(results, model_version)
+                scored += len(results)
+            if done:
+                elapsed = time.perf_counter() - started
+                print(f"누적 {scored}건 ({scored / elapsed:.1f} reviews/s)")
+
+        for chunk in _stream_chunks(model_version, chunk_size):
+            in_flight.add(executor.submit(_score_chunk, chunk))
+            # 메모리를 일정하게 유지하도록 처리 중인 묶음 수를 제한합니다.
+            if len(in_flight) >= workers * 2:
+                drain(FIRST_COMPLETED)
+        while in_flight:
+            drain(FIRST_COMPLETED)
+
+    if scored:
+        # 감정이 바뀐 리뷰의 긍정 수를 반영하도록 집계를 다시 계산합니다.
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                movie_stats.rebuild(cur)
+            conn.commit()
+        finally:
+            conn.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"재분석 완료: {scored}건, {elapsed:.1f}s ({scored / elapsed if elapsed else 0:.1f} reviews/s)")
+    return scored
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="현재 모델로 REVIEW 감정을 일괄 재분석")
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=256)
+    args = parser.parse_args()
+
+    ensure_model_version_column()
+    rescore(args.workers, args.chunk_size)
@@ -0,0 +1,133 @@
+import os
+import queue
+import threading
+import time
+
+from checkdb import fetch_pending_reviews, update_review_sentiments
+
+# 리뷰 감정 분석 비동기 처리: 리뷰는 'pending'으로 먼저 저장하고,
+# 백그라운드 워커가 큐에서 모아 배치로 분석한 뒤 REVIEW.sentiment를 갱신합니다.
+# REVIEW의 'pending' 행 자체가 DB 작업 목록 역할을 하므로, 프로세스가 재시작되어도 start() 시 다시 처리합니다.
+PENDING = 'pending'
+SENTIMENT_ASYNC = os.getenv('SENTIMENT_ASYNC') == '1'
+WORKER_COUNT = int(os.getenv('SENTIMENT_WORKERS', 1))
+BATCH_SIZE = int(os.getenv('SENTIMENT_BATCH_SIZE', 32))
+BATCH_WAIT = float(os.getenv('SENTIMENT_BATCH_WAIT_MS', 50)) / 1000.0
+MAX_RETRIES = int(os.getenv('SENTIMENT_MAX_RETRIES', 5))  # 실패한 리뷰를 다시 시도하는 최대 횟수
+RETRY_BASE_DELAY = float(os.getenv('SENTIMENT_RETRY_BASE_DELAY', 2))  # 첫 재시도까지 기다리는 시간(초), 매번 2배
+RETRY_MAX_DELAY = 300.0
+
+_queue = queue.Queue()
+_threads = []
+_start_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {'enqueued': 0, 'scored': 0, 'batches': 0, 'failures': 0, 'retries': 0, 'abandoned': 0}
+_attempts = {}  # (user_id, movie_id) -> 실패 횟수
+
+
+def submit(user_id, movie_id, review_text):
+    """분석할 리뷰를 큐에 넣습니다. 워커가 아직 없으면 시작합니다."""
+    if (user_id, movie_id) in start():
+        return  # 시작하면서 DB의 pending 리뷰로 이미 큐에 들어감
+    _queue.put((user_id, movie_id, review_text))
+    with _stats_lock:
+        _stats['enqueued'] += 1
+
+
+def _collect_batch():
+    batch = [_queue.get()]
+    deadline = time.monotonic() + BATCH_WAIT
+    while len(batch) < BATCH_SIZE:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(_queue.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return batch
+
+
+def _run():
+    from lstm_model import predict_sentiments
+
+    while True:
+        batch = _collect_batch()
+        try:
+            sentiments = predict_sentiments([review_text for _, _, review_text in batch])
+            update_review_sentiments([
+                (user_id, movie_id, sentiment)
+                for (user_id, movie_id, _), sentiment in zip(batch, sentiments)
+            ])
+            with _stats_lock:
+                _stats['scored'] += len(batch)
+                _stats['batches'] += 1
+                for user_id, movie_id, _ in batch:
+                    _attempts.pop((user_id, movie_id), None)
+        except Exception as e:
+            print(f"Error scoring {len(batch)} pending reviews: {e}")
+            _retry_later(batch)
+
+
+def _retry_later(batch):
+    """
+    실패한 리뷰를 지수 백오프 후 다시 큐에 넣습니다. (DB 일시 장애 등)
+    MAX_RETRIES를 넘긴 리뷰는 'pending'으로 남겨 두고 다음 start() 때 다시 처리합니다.
+    """
+    retry_groups = {}
+    with _stats_lock:
+        _stats['failures'] += len(batch)
+        for item in batch:
+            key = (item[0], item[1])
+            attempt = _attempts.get(key, 0) + 1
+            if attempt > MAX_RETRIES:
+                _attempts.pop(key, None)
+                _stats['abandoned'] += 1
+                continue
+            _attempts[key] = attempt
+            _stats['retries'] += 1
+            retry_groups.setdefault(attempt, []).append(item)
+    for attempt, items in retry_groups.items():
+        delay = min(RETRY_BASE_DELAY * 2 ** (attempt - 1), RETRY_MAX_DELAY)
+        timer = threading.Timer(delay, _requeue, args=(items,))
+        timer.daemon = True
+        timer.start()
+
+
+def _requeue(items):
+    for item in items:
+        _queue.put(item)
+
+
+def start(recover=True):
+    """
+    워커 스레드를 시작합니다. (프로세스당 1회)
+    recover=True면 DB에 남은 'pending' 리뷰도 큐에 넣고, 넣은 (user_id, movie_id) 집합을 반환합니다.
+    """
+    if _threads:
+        return set()
+    with _start_lock:
+        if _threads:
+            return set()
+        for i in range(WORKER_COUNT):
+            thread = threading.Thread(target=_run, name=f'sentiment-worker-{i}', daemon=True)
+            thread.start()
+            _threads.append(thread)
+    recovered = set()
+    if recover:
+        for review in fetch_pending_reviews():
+            _queue.put((review['user_id'], review['movie_id'], review['review_text']))
+            recovered.add((review['user_id'], review['movie_id']))
+        if recovered:
+            print(f"남아 있던 pending 리뷰 {len(recovered)}건을 다시 분석합니다.")
+    return recovered
+
+
+def get_worker_stats():
+    """큐 길이와 처리 건수를 반환합니다."""
+    with _stats_lock:
+        stats = dict(_stats)
+        stats['retrying'] = len(_attempts)
+    stats['queued'] = _queue.qsize()
+    stats['workers'] = len(_threads)
+    return stats
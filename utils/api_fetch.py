@@ -1,6 +1,7 @@
 import sys
 import os
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # 상위 디렉토리를 PYTHONPATH에 추가
@@ -22,8 +23,14 @@ load_dotenv(dotenv_path="C:\\Users\\you0m\\Desktop\\movie\\env_example.env")
 # load_dotenv()
 
 TMDB_API_KEY = os.getenv('TMDB_API_KEY')
-TMDB_BASE_URL = 'https://api.themoviedb.org/3'
+TMDB_BASE_URL = os.getenv('TMDB_BASE_URL', 'https://api.themoviedb.org/3')  # 테스트 시 로컬 스텁 서버 주소로 교체 가능
+TMDB_MAX_CONCURRENCY = int(os.getenv('TMDB_MAX_CONCURRENCY', 8))  # 동시에 보내는 최대 요청 수
 
+from utils.tmdb_cache import tmdb_cached, NotFound  # noqa: E402
+from utils.http_session import get_with_retry  # noqa: E402
+from utils.tracing import instrument_module  # noqa: E402
+
+@tmdb_cached('search')
 def search_tmdb_movie(query, response_format='json'):
     if response_format != 'json':
         raise ValueError("TMDB API는 'json' 형식만 지원합니다.")
@@ -36,13 +43,16 @@ def search_tmdb_movie(query, response_format='json'):
     }
     
     try:
-        response = requests.get(endpoint, params=params)
+        response = get_with_retry(endpoint, params=params)
+        if response.status_code == 404:
+            raise NotFound(endpoint)  # 없는 영화는 잠시 동안 다시 요청하지 않도록 캐시
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
         print(f"TMDB API 요청 중 오류 발생: {e}")
         return None
 
+@tmdb_cached('details')
 def get_tmdb_movie_details(tmdb_id):
     # 기본 영화 세부 정보 (한국어)
     endpoint = f"{TMDB_BASE_URL}/movie/{tmdb_id}"
@@ -53,7 +63,9 @@ def get_tmdb_movie_details(tmdb_id):
     
     try:
         # 기본 영화 정보 요청
-        response = requests.get(endpoint, params=params)
+        response = get_with_retry(endpoint, params=params)
+        if response.status_code == 404:
+            raise NotFound(endpoint)  # 없는 영화는 잠시 동안 다시 요청하지 않도록 캐시
         response.raise_for_status()
         movie_details = response.json()
 
@@ -62,6 +74,29 @@ def get_tmdb_movie_details(tmdb_id):
         print(f"TMDB API 요청 중 오류 발생: {e}")
         return None
 
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=TMDB_MAX_CONCURRENCY, thread_name_prefix='tmdb-fetch')
+    return _executor
+
+
+def get_tmdb_movie_details_many(tmdb_ids):
+    """
+    여러 영화의 세부 정보를 동시에 요청해 {tmdb_id: 세부 정보} 딕셔너리로 반환합니다.
+    동시 요청 수는 TMDB_MAX_CONCURRENCY로 제한되며, 실패한 영화의 값은 None입니다.
+    """
+    unique_ids = list(dict.fromkeys(tmdb_ids))
+    if len(unique_ids) <= 1:
+        return {tmdb_id: get_tmdb_movie_details(tmdb_id) for tmdb_id in unique_ids}
+    results = _get_executor().map(get_tmdb_movie_details, unique_ids)
+    return dict(zip(unique_ids, results))
+
+
+@tmdb_cached('credits')
 def get_tmdb_movie_credits(tmdb_id):
     """TMDB API를 통해 영화의 출연진 및 제작진 정보를 가져옵니다."""
     endpoint = f"{TMDB_BASE_URL}/movie/{tmdb_id}/credits"
@@ -71,13 +106,69 @@ def get_tmdb_movie_credits(tmdb_id):
     }
     
     try:
-        response = requests.get(endpoint, params=params)
+        response = get_with_retry(endpoint, params=params)
+        if response.status_code == 404:
+            raise NotFound(endpoint)  # 없는 영화는 잠시 동안 다시 요청하지 않도록 캐시
         response.raise_for_status()
         return response.json()
     except requests.exceptions.RequestException as e:
         print(f"TMDB API 요청 중 오류 발생: {e}")
         return None
-    
+
+@tmdb_cached('full')
+def get_tmdb_movie_full(tmdb_id):
+    """
+    세부 정보, 장르, 출연진/제작진(credits), 이미지(images)를 append_to_response로 한 번에 가져옵니다.
+    반환값은 세부 정보 딕셔너리에 'credits'와 'images' 키가 추가된 형태입니다.
+    """
+    endpoint = f"{TMDB_BASE_URL}/movie/{tmdb_id}"
+    params = {
+        'api_key': TMDB_API_KEY,
+        'language': 'ko-KR',
+        'append_to_response': 'credits,images',
+        'include_image_language': 'ko,null'  # 한국어 및 언어 없는 이미지
+    }
+
+    try:
+        response = get_with_retry(endpoint, params=params)
+        if response.status_code == 404:
+            raise NotFound(endpoint)  # 없는 영화는 잠시 동안 다시 요청하지 않도록 캐시
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        print(f"TMDB API 요청 중 오류 발생: {e}")
+        return None
+
+TMDB_LIST_ENDPOINTS = {
+    'popular': '/movie/popular',
+    'top_rated': '/movie/top_rated',
+    'now_playing': '/movie/now_playing',
+    'discover': '/discover/movie',
+    'changes': '/movie/changes',
+}
+
+
+def get_tmdb_movie_list_page(source, page=1, **extra_params):
+    """
+    TMDB 영화 목록(popular, top_rated, now_playing, discover, changes)의 한 페이지를 가져옵니다.
+    목록은 자주 바뀌므로 캐시하지 않습니다.
+    """
+    endpoint = f"{TMDB_BASE_URL}{TMDB_LIST_ENDPOINTS[source]}"
+    params = {
+        'api_key': TMDB_API_KEY,
+        'language': 'ko-KR',
+        'page': page,
+        **extra_params
+    }
+
+    try:
+        response = get_with_retry(endpoint, params=params)
+        response.raise_for_status()
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        print(f"TMDB API 요청 중 오류 발생: {e}")
+        return None
+
 def get_tmdb_movie_details_with_genres(tmdb_id):
     """
     TMDB API에서 영화 세부 정보와 장르 정보를 가져옵니다.
@@ -86,4 +177,8 @@ def get_tmdb_movie_details_with_genres(tmdb_id):
     if movie_details:
         genres = movie_details.get('genres', [])
         return movie_details, genres
-    return None, None
\ No newline at end of file
+    return None, None
+
+
+# 모든 TMDB 조회 함수의 실행 시간(캐시 적중 포함)을 'tmdb.<함수 이름>' 단계로 기록
+instrument_module(sys.modules[__name__], 'tmdb')
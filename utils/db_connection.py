@@ -1,29 +1,43 @@
 import pymysql
 import os
 from dotenv import load_dotenv
+from utils.db_pool import get_pool, PoolTimeoutError, DB_CONNECT_TIMEOUT, DB_READ_TIMEOUT, DB_WRITE_TIMEOUT
 
 # 환경 변수 로드
 load_dotenv(dotenv_path="../.env")
 
 DB_HOST = os.getenv('DB_HOST')
+DB_PORT = int(os.getenv('DB_PORT', 3306))
 DB_USER = os.getenv('DB_USER')
 DB_PASSWORD = os.getenv('DB_PASSWORD')
 DB_NAME = os.getenv('DB_NAME') 
 
+def _connect():
+    return pymysql.connect(
+        host=DB_HOST,
+        port=DB_PORT,
+        user=DB_USER,
+        password=DB_PASSWORD,
+        db=DB_NAME,
+        charset='utf8mb4',
+        cursorclass=pymysql.cursors.DictCursor,
+        connect_timeout=DB_CONNECT_TIMEOUT,
+        read_timeout=DB_READ_TIMEOUT,
+        write_timeout=DB_WRITE_TIMEOUT
+    )
+
+
+def get_db_pool():
+    """같은 접속 정보를 쓰는 모든 호출이 공유하는 커넥션 풀을 반환합니다."""
+    return get_pool(f"{DB_USER}@{DB_HOST}:{DB_PORT}/{DB_NAME}", _connect)
+
+
 def get_db_connection():
     """
-    MySQL 데이터베이스에 연결합니다.
+    커넥션 풀에서 MySQL 연결을 빌려옵니다. close()를 호출하면 풀에 반납됩니다.
     """
     try:
-        connection = pymysql.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            db=DB_NAME,
-            charset='utf8mb4',
-            cursorclass=pymysql.cursors.DictCursor
-        )
-        return connection
-    except pymysql.MySQLError as e:
+        return get_db_pool().get()
+    except (pymysql.MySQLError, PoolTimeoutError) as e:
         print(f"Error connecting to the database: {e}")
         return None
\ No newline at end of file
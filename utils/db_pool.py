@@ -0,0 +1,311 @@
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# 커넥션 풀 설정 (환경 변수로 조정)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))  # 커넥션을 기다리는 최대 시간(초)
+DB_POOL_HEALTH_CHECK_AFTER = float(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', 30))  # 이 시간 이상 쉰 커넥션은 ping 확인
+DB_POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', 300))  # 이 시간 이상 쉰 커넥션은 닫고 새로 연결
+DB_POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', 3600))  # 커넥션 최대 수명(초)
+# 소켓 시간 제한(초, pymysql.connect에 넘김). 응답 없는 서버 때문에 ping이나 쿼리가 무한히 멈추지 않게 합니다.
+# 오래 걸리는 마이그레이션/배치는 DB_READ_TIMEOUT=0(제한 없음)으로 실행합니다.
+DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', 5))
+DB_READ_TIMEOUT = int(os.getenv('DB_READ_TIMEOUT', 30)) or None
+DB_WRITE_TIMEOUT = int(os.getenv('DB_WRITE_TIMEOUT', 30)) or None
+
+
+# 현재 실행 흐름(스레드/컨텍스트)에서 DB 왕복 횟수를 세는 카운터. count_db_calls() 안에서만 활성화됩니다.
+_db_call_counter = contextvars.ContextVar('db_call_counter', default=None)
+
+
+class DBCallCounter:
+    """execute/executemany/commit/rollback 호출 수를 셉니다."""
+
+    def __init__(self):
+        self.calls = 0
+        self.by_kind = {}
+
+    def add(self, kind):
+        self.calls += 1
+        self.by_kind[kind] = self.by_kind.get(kind, 0) + 1
+
+
+@contextmanager
+def count_db_calls(counter=None):
+    """
+    with 블록 안에서 풀 커넥션으로 보낸 DB 호출 수를 셉니다.
+    이미 있는 counter를 넘기면 이어서 셉니다.
+
+        with count_db_calls() as counter:
+            ...
+        print(counter.calls)
+    """
+    counter = counter or DBCallCounter()
+    token = _db_call_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _db_call_counter.reset(token)
+
+
+def _record_db_call(kind):
+    counter = _db_call_counter.get()
+    if counter is not None:
+        counter.add(kind)
+
+
+class _CountingCursor:
+    # 커서 호출을 그대로 전달하면서 DB 왕복 횟수를 기록합니다.
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, *args, **kwargs):
+        _record_db_call('execute')
+        return self._cursor.execute(*args, **kwargs)
+
+    def executemany(self, *args, **kwargs):
+        _record_db_call('executemany')
+        return self._cursor.executemany(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._cursor.__exit__(exc_type, exc, tb)
+
+
+class PoolTimeoutError(Exception):
+    """풀에서 제한 시간 안에 커넥션을 얻지 못했을 때 발생합니다."""
+
+
+class _Entry:
+    __slots__ = ('conn', 'created_at', 'returned_at')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.returned_at = self.created_at
+
+
+class PooledConnection:
+    """
+    풀에서 빌려온 커넥션입니다. close()를 호출하면 실제로 끊지 않고 풀에 반납합니다.
+    그 외 속성(cursor, commit, rollback 등)은 원래 커넥션으로 전달됩니다.
+    """
+
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+
+    def __getattr__(self, name):
+        entry = self.__dict__.get('_entry')
+        if entry is None:
+            raise AttributeError(f"반납된 커넥션의 '{name}' 속성에 접근할 수 없습니다.")
+        return getattr(entry.conn, name)
+
+    def cursor(self, *args, **kwargs):
+        return _CountingCursor(self._entry.conn.cursor(*args, **kwargs))
+
+    def commit(self):
+        _record_db_call('commit')
+        return self._entry.conn.commit()
+
+    def rollback(self):
+        _record_db_call('rollback')
+        return self._entry.conn.rollback()
+
+    def close(self):
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool._release(entry)
+
+    def __del__(self):
+        # close() 없이 버려진 커넥션도 풀 자리를 차지하지 않도록 반납합니다.
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    스레드 안전한 DB 커넥션 풀입니다.
+    크기 제한, 대기 시간 제한, ping 상태 확인, 오래된 커넥션 교체를 지원합니다.
+    """
+
+    def __init__(self, connect, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                 health_check_after=DB_POOL_HEALTH_CHECK_AFTER, max_idle=DB_POOL_MAX_IDLE,
+                 max_lifetime=DB_POOL_MAX_LIFETIME):
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self._idle = deque()
+        self._open = 0
+        self._cond = threading.Condition()
+        self._metrics = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_seconds_total': 0.0,
+            'wait_seconds_max': 0.0,
+            'timeouts': 0,
+            'created': 0,
+            'recycled': 0,
+            'health_check_failures': 0,
+        }
+
+    def _close_quietly(self, entry):
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+
+    def _is_usable(self, entry):
+        # 잠금 밖에서 호출합니다. ping은 네트워크 왕복이라 잠금 안에서 하면 다른 스레드의 대여/반납이 모두 멈춥니다.
+        now = time.monotonic()
+        if now - entry.created_at > self.max_lifetime or now - entry.returned_at > self.max_idle:
+            with self._cond:
+                self._metrics['recycled'] += 1
+            return False
+        if now - entry.returned_at > self.health_check_after:
+            try:
+                entry.conn.ping(reconnect=False)
+            except Exception:
+                with self._cond:
+                    self._metrics['health_check_failures'] += 1
+                return False
+        return True
+
+    def get(self):
+        """커넥션을 빌려옵니다. 사용 후 반드시 close()로 반납해야 합니다."""
+        start = time.monotonic()
+        waited = False
+        while True:
+            # 잠금 안에서는 쉬는 커넥션을 꺼내거나 새 연결 자리만 잡습니다. (꺼낸 커넥션도 _open에 포함)
+            with self._cond:
+                while not self._idle and self._open >= self.size:
+                    remaining = self.timeout - (time.monotonic() - start)
+                    if remaining <= 0:
+                        self._metrics['timeouts'] += 1
+                        raise PoolTimeoutError(f"{self.timeout}초 안에 DB 커넥션을 얻지 못했습니다. (풀 크기 {self.size})")
+                    waited = True
+                    self._cond.wait(remaining)
+                if self._idle:
+                    entry = self._idle.pop()
+                else:
+                    self._open += 1
+                    break
+
+            if self._is_usable(entry):
+                with self._cond:
+                    return self._checked_out(entry, start, waited)
+            self._close_quietly(entry)
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+
+        # 새 연결은 잠금 밖에서 맺습니다.
+        try:
+            entry = _Entry(self._connect())
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._metrics['created'] += 1
+            return self._checked_out(entry, start, waited)
+
+    def _checked_out(self, entry, start, waited):
+        wait = time.monotonic() - start
+        self._metrics['checkouts'] += 1
+        if waited:
+            self._metrics['waits'] += 1
+        self._metrics['wait_seconds_total'] += wait
+        self._metrics['wait_seconds_max'] = max(self._metrics['wait_seconds_max'], wait)
+        return PooledConnection(self, entry)
+
+    def _release(self, entry):
+        # 커밋되지 않은 트랜잭션이 다음 사용자에게 넘어가지 않도록 롤백한 뒤 반납합니다. (DB 왕복이므로 호출 수에 포함)
+        _record_db_call('rollback')
+        try:
+            entry.conn.rollback()
+            usable = True
+        except Exception:
+            usable = False
+        with self._cond:
+            if usable:
+                entry.returned_at = time.monotonic()
+                self._idle.append(entry)
+            else:
+                self._open -= 1
+                self._close_quietly(entry)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """with 문으로 커넥션을 빌리고 자동으로 반납합니다."""
+        conn = self.get()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def close_all(self):
+        """쉬고 있는 커넥션을 모두 닫습니다."""
+        with self._cond:
+            while self._idle:
+                self._open -= 1
+                self._close_quietly(self._idle.pop())
+
+    def metrics(self):
+        """풀 사용량과 대기 시간 지표를 반환합니다."""
+        with self._cond:
+            metrics = dict(self._metrics)
+            metrics.update(
+                size=self.size,
+                open=self._open,
+                idle=len(self._idle),
+                in_use=self._open - len(self._idle),
+                wait_seconds_avg=metrics['wait_seconds_total'] / metrics['checkouts'] if metrics['checkouts'] else 0.0,
+            )
+            return metrics
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name, connect, **kwargs):
+    """이름별로 프로세스 전체에서 공유되는 풀을 반환합니다."""
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                pool = _pools[name] = ConnectionPool(connect, **kwargs)
+    return pool
+
+
+def get_all_pool_metrics():
+    """모든 풀의 지표를 이름별로 반환합니다."""
+    return {name: pool.metrics() for name, pool in list(_pools.items())}
@@ -0,0 +1,120 @@
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+# 외부 HTTP 호출 공통 계층: keep-alive 세션 풀, 타임아웃, 재시도(지터 포함 지수 백오프), 토큰 버킷 속도 제한
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 3.05))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 10))
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 3))
+HTTP_BACKOFF_BASE = float(os.getenv('HTTP_BACKOFF_BASE', 0.5))  # 첫 재시도 대기 상한(초)
+HTTP_BACKOFF_MAX = float(os.getenv('HTTP_BACKOFF_MAX', 8))
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 20))
+# TMDB 요청 한도에 맞춘 클라이언트 측 제한 (초당 요청 수, 순간 최대 요청 수)
+TMDB_RATE_LIMIT = float(os.getenv('TMDB_RATE_LIMIT', 40))
+TMDB_RATE_BURST = int(os.getenv('TMDB_RATE_BURST', 20))
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    스레드 안전한 토큰 버킷입니다. 초당 rate개의 토큰이 채워지고 최대 capacity개까지 쌓입니다.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        """토큰을 얻을 때까지 기다립니다. 기다린 시간(초)을 반환합니다."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def _backoff_delay(attempt, retry_after=None):
+    # Retry-After가 있으면 따르고, 없으면 full jitter 지수 백오프를 사용합니다.
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), HTTP_BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+
+_session = None
+_session_lock = threading.Lock()
+_tmdb_bucket = TokenBucket(TMDB_RATE_LIMIT, TMDB_RATE_BURST)
+_stats_lock = threading.Lock()
+_stats = {'requests': 0, 'retries': 0, 'throttled_seconds': 0.0, 'failures': 0}
+
+
+def get_session():
+    """프로세스 전체에서 공유하는 keep-alive 세션을 반환합니다."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def get_with_retry(url, params=None, bucket=_tmdb_bucket, max_retries=HTTP_MAX_RETRIES):
+    """
+    공유 세션으로 GET 요청을 보냅니다.
+    429와 5xx 응답, 연결/타임아웃 오류는 지수 백오프로 재시도하고 마지막 응답을 그대로 반환합니다.
+    재시도 후에도 연결 오류가 나면 requests 예외를 다시 던집니다.
+    """
+    session = get_session()
+    for attempt in range(max_retries + 1):
+        if bucket is not None:
+            throttled = bucket.acquire()
+            if throttled:
+                with _stats_lock:
+                    _stats['throttled_seconds'] += throttled
+        with _stats_lock:
+            _stats['requests'] += 1
+        try:
+            response = session.get(url, params=params, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == max_retries:
+                with _stats_lock:
+                    _stats['failures'] += 1
+                raise
+            delay = _backoff_delay(attempt)
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or attempt == max_retries:
+                return response
+            delay = _backoff_delay(attempt, response.headers.get('Retry-After'))
+            response.close()
+        with _stats_lock:
+            _stats['retries'] += 1
+        time.sleep(delay)
+
+
+def get_http_stats():
+    """요청 수, 재시도 수, 속도 제한으로 기다린 시간 등을 반환합니다."""
+    with _stats_lock:
+        return dict(_stats)
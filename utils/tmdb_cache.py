@@ -0,0 +1,190 @@
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+from utils.lru_cache import LRUCache
+
+# TMDB 응답 2단 캐시: 메모리 LRU + SQLite 디스크 캐시
+TMDB_MEMORY_CACHE_SIZE = int(os.getenv('TMDB_MEMORY_CACHE_SIZE', 2000))
+TMDB_DISK_CACHE_PATH = os.getenv('TMDB_DISK_CACHE_PATH', 'data/tmdb_cache.sqlite3')  # 빈 값이면 디스크 캐시 사용 안 함
+TMDB_DISK_CACHE_MAX_ROWS = int(os.getenv('TMDB_DISK_CACHE_MAX_ROWS', 100000))
+
+# 엔드포인트별 TTL(초)
+TMDB_CACHE_TTLS = {
+    'search': 60 * 60,
+    'details': 24 * 60 * 60,
+    'credits': 24 * 60 * 60,
+    'full': 24 * 60 * 60,
+}
+TMDB_NEGATIVE_TTL = 10 * 60  # 404 응답을 기억하는 시간
+
+
+class NotFound(Exception):
+    """TMDB가 404를 반환했을 때 캐시 계층에 알리기 위한 예외입니다."""
+
+
+_NEGATIVE = {'__tmdb_not_found__': True}
+
+
+class DiskCache:
+    """
+    SQLite 기반 영속 캐시입니다. 행 수가 max_rows를 넘으면 가장 오래 사용하지 않은 항목부터 지웁니다.
+    """
+
+    def __init__(self, path, max_rows=TMDB_DISK_CACHE_MAX_ROWS):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS tmdb_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tmdb_cache_accessed ON tmdb_cache (accessed_at)")
+        self._conn.commit()
+        self._puts = 0
+
+    def get(self, key):
+        """(값, 만료 시각)을 반환합니다. 없거나 만료되었으면 None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM tmdb_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM tmdb_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE tmdb_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(row[0]), row[1]
+
+    def put(self, key, value, expires_at):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tmdb_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, now),
+            )
+            self._puts += 1
+            # 크기 확인은 가끔만 수행합니다.
+            if self._puts % 100 == 0:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM tmdb_cache WHERE expires_at <= ?", (now,))
+        count = self._conn.execute("SELECT COUNT(*) FROM tmdb_cache").fetchone()[0]
+        if count > self.max_rows:
+            self._conn.execute("""
+                DELETE FROM tmdb_cache WHERE key IN (
+                    SELECT key FROM tmdb_cache ORDER BY accessed_at LIMIT ?
+                )
+            """, (count - self.max_rows,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM tmdb_cache")
+            self._conn.commit()
+
+
+_memory = LRUCache(TMDB_MEMORY_CACHE_SIZE)
+_disk = None
+_disk_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'negative_hits': 0, 'expired': 0}
+
+
+def _get_disk():
+    global _disk
+    if TMDB_DISK_CACHE_PATH and _disk is None:
+        with _disk_lock:
+            if _disk is None:
+                _disk = DiskCache(TMDB_DISK_CACHE_PATH)
+    return _disk
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _unwrap(value):
+    if value == _NEGATIVE:
+        _count('negative_hits')
+        return None
+    return value
+
+
+def tmdb_cached(endpoint):
+    """
+    TMDB 조회 함수를 2단 캐시로 감쌉니다.
+    감싼 함수가 NotFound를 던지면 404를 TMDB_NEGATIVE_TTL 동안 기억하고 None을 반환합니다.
+    None(일시적 오류)은 캐시하지 않습니다.
+    """
+    ttl = TMDB_CACHE_TTLS[endpoint]
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = f"{endpoint}:{json.dumps([args, kwargs], sort_keys=True, ensure_ascii=False, default=str)}"
+            now = time.time()
+
+            entry = _memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    _count('memory_hits')
+                    return _unwrap(value)
+                _memory.pop(key)
+                _count('expired')
+
+            disk = _get_disk()
+            if disk is not None:
+                entry = disk.get(key)
+                if entry is not None:
+                    _memory.put(key, entry)
+                    _count('disk_hits')
+                    return _unwrap(entry[0])
+
+            _count('misses')
+            try:
+                value, expires_at = func(*args, **kwargs), now + ttl
+            except NotFound:
+                value, expires_at = _NEGATIVE, now + TMDB_NEGATIVE_TTL
+            if value is None:
+                return None
+            _memory.put(key, (value, expires_at))
+            if disk is not None:
+                disk.put(key, value, expires_at)
+            return None if value is _NEGATIVE else value
+
+        return wrapper
+
+    return decorator
+
+
+def get_tmdb_cache_stats():
+    """메모리/디스크 캐시 적중, 실패, 404 캐시 적중 통계를 반환합니다."""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+    stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+    stats['memory'] = _memory.stats()
+    return stats
+
+
+def clear_tmdb_cache():
+    """메모리와 디스크 캐시를 모두 비웁니다."""
+    _memory.clear()
+    disk = _get_disk()
+    if disk is not None:
+        disk.clear()
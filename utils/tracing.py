@@ -0,0 +1,308 @@
+import contextvars
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 단계별 지연 시간 측정: DB(checkdb), TMDB(api_fetch), 감정 분석 단계(model.*)마다 span을 기록합니다.
+# - 단계별 히스토그램은 프로세스 전체에서 누적되고 Prometheus 텍스트 형식으로 파일(또는 HTTP)로 내보냅니다.
+# - Streamlit 스크립트 실행 1회 동안의 span은 begin_run()/end_run() 사이에 모아 최근 실행 목록에 남깁니다.
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', '1') == '1'
+TRACING_EXPORT_PATH = os.getenv('TRACING_EXPORT_PATH', 'data/metrics.prom')  # 빈 값이면 파일로 내보내지 않음
+TRACING_EXPORT_INTERVAL = float(os.getenv('TRACING_EXPORT_INTERVAL', 10))  # 파일을 다시 쓰는 최소 간격(초)
+TRACING_METRICS_PORT = int(os.getenv('TRACING_METRICS_PORT', 0))  # 0이 아니면 이 포트에서 /metrics 제공
+TRACING_RECENT_RUNS = 20
+
+# 히스토그램 버킷 상한(초)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 현재 Streamlit 실행의 span 목록. begin_run() 이후에만 활성화됩니다.
+_current_run = contextvars.ContextVar('tracing_run', default=None)
+
+
+class Histogram:
+    """누적 버킷 히스토그램입니다. (Prometheus histogram과 같은 의미)"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 마지막 칸은 +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """버킷 경계로 근사한 분위수(초)를 반환합니다."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for upper, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return upper if upper != float('inf') else self.buckets[-1]
+        return self.buckets[-1]
+
+
+class Run:
+    """Streamlit 스크립트 실행 1회 동안 기록된 span 목록입니다."""
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.duration = None
+        self.spans = []  # (이름, 시작 오프셋(초), 걸린 시간(초), 깊이)
+        self.values = {}  # record_value로 남긴 값 (예: 검색 1회의 DB 호출 수)
+        self.depth = 0
+
+    def totals(self):
+        """단계 이름별 (호출 수, 합계 시간)을 반환합니다."""
+        totals = {}
+        for name, _, duration, _ in self.spans:
+            calls, total = totals.get(name, (0, 0.0))
+            totals[name] = (calls + 1, total + duration)
+        return totals
+
+
+_lock = threading.Lock()
+_histograms = {}
+_run_histogram = Histogram()
+_gauges = {}  # 이름 -> 마지막으로 기록한 값
+_recent_runs = deque(maxlen=TRACING_RECENT_RUNS)
+_last_export = 0.0
+
+
+def _observe(name, duration):
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(duration)
+
+
+@contextmanager
+def span(name):
+    """
+    with 블록에 걸린 시간을 단계 name의 히스토그램과 현재 실행의 span 목록에 기록합니다.
+
+        with span('model.infer'):
+            ...
+    """
+    if not TRACING_ENABLED:
+        yield
+        return
+    run = _current_run.get()
+    depth = 0
+    if run is not None:
+        depth = run.depth
+        run.depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - started
+        _observe(name, duration)
+        if run is not None:
+            run.depth = depth
+            run.spans.append((name, started - run._started, duration, depth))
+
+
+def record_value(name, value):
+    """
+    지연 시간이 아닌 값(예: 'search.db_calls')을 기록합니다.
+    현재 실행의 values와 마지막 값 gauge(movie_run_value)에 남습니다.
+    """
+    if not TRACING_ENABLED:
+        return
+    run = _current_run.get()
+    if run is not None:
+        run.values[name] = value
+    with _lock:
+        _gauges[name] = value
+
+
+def traced(name):
+    """함수 호출 전체를 span(name)으로 감싸는 데코레이터입니다."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        wrapper.__traced__ = True
+        return wrapper
+    return decorator
+
+
+def instrument_module(module, prefix):
+    """
+    module에 정의된 공개 함수(밑줄로 시작하지 않는 함수)를 모두 '<prefix>.<함수 이름>' span으로 감쌉니다.
+    모듈 끝에서 호출하면 모듈 안의 호출과 다른 모듈의 from-import 모두 감싼 함수를 사용합니다.
+    """
+    for attr, func in list(vars(module).items()):
+        if attr.startswith('_') or not inspect.isfunction(func) or getattr(func, '__traced__', False):
+            continue
+        if func.__module__ != module.__name__:
+            continue  # 다른 모듈에서 import한 함수는 그 모듈에서 측정
+        setattr(module, attr, traced(f"{prefix}.{attr}")(func))
+
+
+def begin_run(name='app'):
+    """
+    새 실행을 시작합니다. Streamlit 스크립트 맨 위에서 호출합니다.
+    이전 실행이 end_run() 없이 끝났다면(st.rerun 등) 여기서 마무리합니다.
+    """
+    if not TRACING_ENABLED:
+        return None
+    end_run()
+    run = Run(name)
+    _current_run.set(run)
+    return run
+
+
+def end_run():
+    """현재 실행을 마무리해 최근 실행 목록과 실행 시간 히스토그램에 기록합니다."""
+    run = _current_run.get()
+    if run is None:
+        return None
+    _current_run.set(None)
+    run.duration = time.perf_counter() - run._started
+    with _lock:
+        _run_histogram.observe(run.duration)
+        _recent_runs.append(run)
+    _maybe_export()
+    return run
+
+
+def current_run():
+    return _current_run.get()
+
+
+def get_recent_runs():
+    """최근 실행 목록을 최신 순으로 반환합니다."""
+    with _lock:
+        return list(reversed(_recent_runs))
+
+
+def get_stage_stats():
+    """단계별 호출 수, 평균, 근사 p50/p95/p99(밀리초)를 반환합니다."""
+    with _lock:
+        histograms = dict(_histograms)
+        stats = {}
+        for name, histogram in sorted(histograms.items()):
+            stats[name] = {
+                'count': histogram.count,
+                'mean_ms': histogram.sum / histogram.count * 1000.0 if histogram.count else 0.0,
+                'p50_ms': histogram.quantile(0.50) * 1000.0,
+                'p95_ms': histogram.quantile(0.95) * 1000.0,
+                'p99_ms': histogram.quantile(0.99) * 1000.0,
+            }
+    return stats
+
+
+def _format_bound(value):
+    return '+Inf' if value == float('inf') else repr(value)
+
+
+def _render_histogram(lines, metric, histogram, labels=''):
+    cumulative = 0
+    separator = ',' if labels else ''
+    for upper, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+        cumulative += count
+        lines.append(f'{metric}_bucket{{{labels}{separator}le="{_format_bound(upper)}"}} {cumulative}')
+    suffix = f'{{{labels}}}' if labels else ''
+    lines.append(f'{metric}_sum{suffix} {histogram.sum}')
+    lines.append(f'{metric}_count{suffix} {histogram.count}')
+
+
+def render_prometheus():
+    """모든 히스토그램을 Prometheus 텍스트 노출 형식으로 반환합니다."""
+    lines = [
+        '# HELP movie_stage_duration_seconds Duration of traced stages (DB, TMDB, model).',
+        '# TYPE movie_stage_duration_seconds histogram',
+    ]
+    with _lock:
+        for name, histogram in sorted(_histograms.items()):
+            _render_histogram(lines, 'movie_stage_duration_seconds', histogram, f'stage="{name}"')
+        lines.append('# HELP movie_run_duration_seconds Duration of one Streamlit script run.')
+        lines.append('# TYPE movie_run_duration_seconds histogram')
+        _render_histogram(lines, 'movie_run_duration_seconds', _run_histogram)
+        if _gauges:
+            lines.append('# HELP movie_run_value Last value recorded with record_value (e.g. DB calls per search).')
+            lines.append('# TYPE movie_run_value gauge')
+            for name, value in sorted(_gauges.items()):
+                lines.append(f'movie_run_value{{name="{name}"}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def export_prometheus(path=TRACING_EXPORT_PATH):
+    """Prometheus 텍스트 형식으로 path에 씁니다. (node_exporter textfile collector 등으로 수집)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+def _maybe_export():
+    global _last_export
+    if not TRACING_EXPORT_PATH:
+        return
+    now = time.monotonic()
+    with _lock:
+        if now - _last_export < TRACING_EXPORT_INTERVAL:
+            return
+        _last_export = now
+    try:
+        export_prometheus(TRACING_EXPORT_PATH)
+    except OSError as e:
+        print(f"Error exporting metrics: {e}")
+
+
+_metrics_server = None
+_metrics_server_lock = threading.Lock()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        payload = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def start_metrics_server(port=TRACING_METRICS_PORT, host='0.0.0.0'):
+    """/metrics 엔드포인트를 백그라운드 스레드에서 제공합니다. (프로세스당 1회)"""
+    global _metrics_server
+    with _metrics_server_lock:
+        if _metrics_server is None and port:
+            try:
+                _metrics_server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                print(f"Error starting metrics server on port {port}: {e}")
+                return None
+            _metrics_server.daemon_threads = True
+            threading.Thread(target=_metrics_server.serve_forever, name='metrics-server', daemon=True).start()
+    return _metrics_server
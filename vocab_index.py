@@ -0,0 +1,126 @@
+import argparse
+import bisect
+import os
+import pickle
+import struct
+import numpy as np
+from utils.lru_cache import LRUCache
+
+# 토크나이저의 word_index만 정렬된 어휘 파일로 저장해 여러 프로세스가 메모리 매핑으로 공유합니다.
+#
+# 파일 구조 (리틀 엔디언):
+#   헤더   : magic(4s) version(I) count(I) num_words(I) oov_id(i) blob_len(Q)
+#   offsets: int64[count + 1]  각 단어의 blob 내 시작 위치
+#   ids    : int32[count]      각 단어의 인덱스
+#   blob   : UTF-8 바이트 순으로 정렬해 이어 붙인 단어들
+VOCAB_PATH = 'models/vocab.bin'
+TOKENIZER_PICKLE_PATH = 'models/tokenizer.pickle'
+_MAGIC = b'VOCB'
+_VERSION = 1
+_HEADER = struct.Struct('<4sIIIiQ')
+# Keras Tokenizer의 기본 filters와 같은 문자 집합
+_KERAS_FILTERS = '!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n'
+_FILTER_TABLE = str.maketrans({ch: ' ' for ch in _KERAS_FILTERS})
+
+
+def write_vocab(word_index, path=VOCAB_PATH, num_words=None, oov_token=None):
+    """word_index(단어 -> 인덱스)를 정렬된 어휘 파일로 저장합니다."""
+    items = sorted((word.encode('utf-8'), index) for word, index in word_index.items())
+    words = [word for word, _ in items]
+    offsets = np.zeros(len(words) + 1, dtype='<i8')
+    offsets[1:] = np.cumsum([len(word) for word in words])
+    ids = np.array([index for _, index in items], dtype='<i4')
+    oov_id = word_index.get(oov_token, -1) if oov_token is not None else -1
+
+    # 실행 중인 프로세스가 기존 파일을 메모리 매핑하고 있으므로 제자리에서 덮어쓰지 않고 교체합니다.
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(words), num_words or 0, oov_id, int(offsets[-1])))
+        f.write(offsets.tobytes())
+        f.write(ids.tobytes())
+        f.write(b''.join(words))
+    os.replace(tmp_path, path)
+    print(f"어휘 파일 저장 완료: {path} ({len(words)}개 단어)")
+    return path
+
+
+def export_from_tokenizer(pickle_path=TOKENIZER_PICKLE_PATH, path=VOCAB_PATH):
+    """기존 Keras 토크나이저 pickle을 어휘 파일로 변환합니다. (Keras 필요)"""
+    with open(pickle_path, 'rb') as handle:
+        tokenizer = pickle.load(handle)
+    return write_vocab(tokenizer.word_index, path, tokenizer.num_words, tokenizer.oov_token)
+
+
+class VocabIndex:
+    """
+    메모리 매핑된 어휘 파일 위에서 Keras Tokenizer.texts_to_sequences와 같은 결과를 만듭니다.
+    """
+
+    def __init__(self, path=VOCAB_PATH, cache_size=50000):
+        raw = np.memmap(path, dtype=np.uint8, mode='r')
+        magic, version, count, num_words, oov_id, blob_len = _HEADER.unpack(raw[:_HEADER.size].tobytes())
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"지원하지 않는 어휘 파일 형식입니다: {path}")
+
+        offsets_start = _HEADER.size
+        ids_start = offsets_start + 8 * (count + 1)
+        blob_start = ids_start + 4 * count
+        self._offsets = np.frombuffer(raw, dtype='<i8', count=count + 1, offset=offsets_start)
+        self._ids = np.frombuffer(raw, dtype='<i4', count=count, offset=ids_start)
+        self._blob = raw[blob_start:blob_start + blob_len]
+        self._raw = raw
+        self.count = count
+        self.num_words = num_words or None
+        self.oov_id = oov_id if oov_id >= 0 else None
+        # 자주 나오는 단어는 이진 탐색 없이 바로 찾도록 프로세스별 캐시를 둡니다.
+        self._cache = LRUCache(cache_size)
+
+    def _word(self, i):
+        return self._blob[self._offsets[i]:self._offsets[i + 1]].tobytes()
+
+    def lookup(self, word):
+        """단어의 인덱스를 반환합니다. 없으면 None."""
+        index = self._cache.get(word)
+        if index is not None:
+            return index if index >= 0 else None
+        key = word.encode('utf-8')
+        pos = bisect.bisect_left(_WordView(self), key)
+        index = int(self._ids[pos]) if pos < self.count and self._word(pos) == key else -1
+        self._cache.put(word, index)
+        return index if index >= 0 else None
+
+    def __len__(self):
+        return self.count
+
+    def texts_to_sequences(self, texts):
+        sequences = []
+        for text in texts:
+            sequence = []
+            for word in text.lower().translate(_FILTER_TABLE).split():
+                index = self.lookup(word)
+                if index is not None and (self.num_words is None or index < self.num_words):
+                    sequence.append(index)
+                elif self.oov_id is not None:
+                    sequence.append(self.oov_id)
+            sequences.append(sequence)
+        return sequences
+
+
+class _WordView:
+    # bisect가 정렬된 단어 목록처럼 다룰 수 있도록 하는 읽기 전용 뷰
+    def __init__(self, vocab):
+        self._vocab = vocab
+
+    def __len__(self):
+        return self._vocab.count
+
+    def __getitem__(self, i):
+        return self._vocab._word(i)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keras 토크나이저를 메모리 매핑 가능한 어휘 파일로 변환")
+    parser.add_argument('--tokenizer', default=TOKENIZER_PICKLE_PATH)
+    parser.add_argument('--output', default=VOCAB_PATH)
+    args = parser.parse_args()
+    export_from_tokenizer(args.tokenizer, args.output)